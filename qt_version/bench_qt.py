@@ -0,0 +1,502 @@
+# benchmarks for the calculator's engines.
+# run from this folder, for example:
+#   python bench_qt.py ref
+#   python bench_qt.py ref --sizes 10 50 100 200 --slow-limit 60
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from fraction_qt import Fraction, get_frac_from_string
+from calc_funcs_qt import *
+import input_funcs_qt
+from matrix_format_qt import format_matrix, iter_format_matrix
+import integer_funcs_qt
+import leibniz_qt
+import eigen_funcs_qt
+import float_funcs_qt
+import modular_funcs_qt
+import parallel_qt
+from rational_matrix_qt import RationalMatrix
+
+
+def random_matrix(rows, cols, rational=False, lo=-9, hi=9, seed=0):
+    """
+    Creates a random matrix of fraction objects.
+    - rows and cols are integers (the size of the matrix).
+    - rational is a bool for whether the entries should have denominators.
+    - lo and hi are integers bounding the numerators (and denominators).
+    - seed is an integer for the random number generator.
+    - Returns a matrix.
+    """
+    rng = random.Random(seed)
+    if rational:
+        return [[Fraction(rng.randint(lo, hi), rng.randint(1, max(hi, 2))) for _ in range(cols)]
+                for _ in range(rows)]
+    return [[Fraction(rng.randint(lo, hi)) for _ in range(cols)] for _ in range(rows)]
+
+def timed(f, *args):
+    """
+    Calls f(*args) and times it.
+    - f is a function.
+    - Returns (result, seconds).
+    """
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+def print_row(*cols):
+    print(''.join(f'{c:>14}' for c in cols))
+
+def fmt_time(t):
+    if t is None:
+        return 'skipped'
+    return f'{t:.4f}s'
+
+
+def bench_ref(args):
+    """
+    Compares the fraction-free (Bareiss) elimination against
+    Gaussian Elimination on fraction objects.
+    """
+    print_row('input', 'n', 'ref_gauss', 'ref_bareiss', 'det (gauss)', 'det')
+    for rational in (False, True):
+        slow_ok = True
+        for n in args.sizes:
+            m = random_matrix(n, n, rational, seed=n)
+            gauss = gauss_det = None
+            if slow_ok:
+                expected, gauss = timed(ref_gauss, m, True)
+                gauss_det = gauss + timed(diagonal_product, expected[0])[1]
+                # don't bother with bigger sizes once the old path gets too slow
+                slow_ok = gauss < args.slow_limit
+            result, bareiss_t = timed(ref_bareiss, m, True)
+            if gauss is not None:
+                assert result == expected, 'ref_bareiss and ref_gauss disagree'
+            _, det_t = timed(det, m)
+            print_row('rational' if rational else 'integer', n, fmt_time(gauss),
+                      fmt_time(bareiss_t), fmt_time(gauss_det), fmt_time(det_t))
+
+def bench_alloc(args):
+    """
+    Measures the memory used by mat_mult on rational matrices with tracemalloc.
+    """
+    f = Fraction(1, 2)
+    print(f'one fraction object is {sys.getsizeof(f)} bytes, has a __dict__: {hasattr(f, "__dict__")}')
+    print_row('n', 'time', 'peak', 'kept', 'kept blocks')
+    for n in args.sizes:
+        m1 = random_matrix(n, n, True, seed=n)
+        m2 = random_matrix(n, n, True, seed=n + 1)
+        tracemalloc.start()
+        result, t = timed(mat_mult, m1, m2)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+        print_row(n, fmt_time(t), f'{peak / 2**20:.2f}MB', f'{current / 2**20:.2f}MB', blocks)
+        del result
+
+def recursive_gcd(a, b):
+    # the gcd fraction_qt used to have (for comparison)
+    if a < 0 and b < 0:
+        a = -a
+        b = -b
+    if a < b:
+        a,b = b,a
+    r = a % b
+    if r == 0:
+        return b
+    return recursive_gcd(b, r)
+
+def bench_gcd(args):
+    """
+    Times each of the gcd backends on random pairs of numbers
+    with a common factor, for a range of bit lengths.
+    """
+    funcs = {'recursive': recursive_gcd, **integer_funcs_qt.GCD_BACKENDS}
+    print_row('bits', *funcs)
+    rng = random.Random(0)
+    for bits in args.bits:
+        pairs = []
+        for _ in range(args.repeat):
+            common = rng.getrandbits(bits // 4 + 1) | 1
+            pairs.append(((rng.getrandbits(bits) + 1) * common, (rng.getrandbits(bits) + 1) * common))
+        times = []
+        for f in funcs.values():
+            start = time.perf_counter()
+            for a, b in pairs:
+                f(a, b)
+            times.append(fmt_time(time.perf_counter() - start))
+        print_row(bits, *times)
+
+def bench_rational(args):
+    """
+    Compares lists of fraction objects against RationalMatrix
+    for mat_mult, aTa and vec_add.
+    """
+    print_row('n', 'mat_mult', '(rational)', 'aTa', '(rational)', 'vec_add', '(rational)')
+    for n in args.sizes:
+        m1 = random_matrix(n, n, True, seed=n)
+        m2 = random_matrix(n, n, True, seed=n + 1)
+        r1 = RationalMatrix.from_rows(m1)
+        r2 = RationalMatrix.from_rows(m2)
+        times = []
+        for f, a, b in ((mat_mult, (m1, m2), (r1, r2)), (aTa, (m1,), (r1,)), (vec_add, (m1[0], m2[0]), (RationalMatrix.from_rows(m1[0]), RationalMatrix.from_rows(m2[0])))):
+            expected, t = timed(f, *a)
+            result, rational_t = timed(f, *b)
+            assert result == expected, f'{f.__name__} gave a different answer for a RationalMatrix'
+            times += [fmt_time(t), fmt_time(rational_t)]
+        print_row(n, *times)
+
+def bench_float(args):
+    """
+    Times the numpy-backed operations which are used when
+    the inputs have decimals in them.
+    """
+    print_row('n', 'mat_mult', 'det', 'inverse', 'solve', 'qr')
+    for n in args.sizes:
+        rng = random.Random(n)
+        m = [[Fraction(rng.uniform(-9, 9)) for _ in range(n)] for _ in range(n)]
+        b = [Fraction(rng.uniform(-9, 9)) for _ in range(n)]
+        times = [timed(mat_mult, m, m)[1], timed(det, m)[1], timed(inverse, m)[1],
+                 timed(solve, b, m)[1], timed(qr, m)[1]]
+        print_row(n, *map(fmt_time, times))
+
+def bench_modular(args):
+    """
+    Compares bareiss against the multi-modular determinant
+    (with and without stopping early).
+    """
+    print_row('input', 'n', 'bareiss', 'modular', '(no early)', 'primes')
+    for rational in (False, True):
+        for n in args.sizes:
+            rows, _ = clear_denominators(random_matrix(n, n, rational, seed=n))
+            (reduced, _, _, d), bareiss_t = timed(bareiss, rows)
+            result, modular_t = timed(modular_funcs_qt.det_int, rows)
+            full, full_t = timed(modular_funcs_qt.det_int, rows, False)
+            assert result == full == reduced[-1][-1] * d, 'the determinants are different'
+            bits = modular_funcs_qt.hadamard_bound(rows).bit_length() + 1
+            print_row('rational' if rational else 'integer', n, fmt_time(bareiss_t),
+                      fmt_time(modular_t), fmt_time(full_t), -(-bits // 31))
+
+def bench_solve(args):
+    """
+    Compares Dixon's p-adic lifting against Gauss-Jordan Elimination for
+    solving Ax = b, first as n grows and then as the entries get bigger.
+    """
+    print_row('n', 'bits', 'solve_rref', 'solve_dixon')
+    cases = [(n, 4) for n in args.sizes] + [(args.sizes[0], bits) for bits in args.bits]
+    slow_ok = True
+    for n, bits in cases:
+        rng = random.Random(n * bits)
+        hi = 2 ** bits
+        A = [[Fraction(rng.randint(-hi, hi)) for _ in range(n)] for _ in range(n)]
+        b = [Fraction(rng.randint(-hi, hi)) for _ in range(n)]
+        rref_t = None
+        if slow_ok or n == args.sizes[0]:
+            expected, rref_t = timed(solve_rref, b, A)
+            slow_ok = rref_t < args.slow_limit
+        result, dixon_t = timed(solve_dixon, b, A)
+        if rref_t is not None:
+            assert result == expected, 'solve_dixon and solve_rref disagree'
+        print_row(n, bits, fmt_time(rref_t), fmt_time(dixon_t))
+
+
+def bench_lu(args):
+    """
+    Solves Ax = b for 20 different b's, once by calling solve every time
+    and once by factoring A first and reusing the factorization.
+    """
+    count = 20
+    print_row('n', 'solve x20', 'LU x20')
+    for n in args.sizes:
+        A = random_matrix(n, n, seed=n)
+        bs = [[row[0] for row in random_matrix(n, 1, seed=n + i)] for i in range(count)]
+        start = time.perf_counter()
+        expected = [solve(b, A) for b in bs]
+        solve_t = time.perf_counter() - start
+        start = time.perf_counter()
+        lu = LUFactorization(A)
+        results = [lu.solve(b) for b in bs]
+        lu_t = time.perf_counter() - start
+        assert results == expected, 'LUFactorization.solve and solve disagree'
+        print_row(n, fmt_time(solve_t), fmt_time(lu_t))
+
+
+def unshifted_qr(m, iterations=500):
+    # the old eigen_matrix: a fixed number of plain QR steps with numpy
+    a = float_funcs_qt.to_array(m)
+    for _ in range(iterations):
+        q, r = float_funcs_qt.qr_array(a)
+        a = r @ q
+    return a
+
+def bench_eigen(args):
+    """
+    Compares 500 unshifted QR steps against hessenberg reduction plus the
+    shifted QR-algorithm, and shows how many steps the shifted one needed.
+    """
+    print_row('n', '500 unshifted', 'shifted', 'iterations')
+    for n in args.sizes:
+        m = random_matrix(n, n, seed=n)
+        _, old_t = timed(unshifted_qr, m)
+        (_, _, iterations, converged, _), new_t = timed(eigen_matrix, m, True)
+        print_row(n, fmt_time(old_t), fmt_time(new_t), iterations if converged else 'gave up')
+
+def bench_symmetric_eigen(args):
+    """
+    Compares the shifted QR-algorithm against tridiagonal form plus the
+    QL-algorithm on symmetric matrices (M^T * M), and how many steps each needed.
+    """
+    print_row('n', 'schur', 'steps', 'QL', 'steps', 'QL + vectors')
+    for n in args.sizes:
+        a = float_funcs_qt.to_array(aTa(random_matrix(n, n, seed=n)))
+        (_, expected, schur_steps, _), schur_t = timed(eigen_funcs_qt.schur, a)
+        (values, _, ql_steps, _), ql_t = timed(eigen_funcs_qt.symmetric_eigen, a, False)
+        _, vectors_t = timed(eigen_funcs_qt.symmetric_eigen, a, True)
+        assert all(abs(x - y) <= 1e-6 * max(1, abs(y)) for x, y in zip(values, sorted(expected, reverse=True))), \
+            'schur and symmetric_eigen found different eigenvalues'
+        print_row(n, fmt_time(schur_t), schur_steps, fmt_time(ql_t), ql_steps, fmt_time(vectors_t))
+
+
+def gram_schmidt_qr(m):
+    # the old qr: Q from gram-schmidt, then R = Q^T * m
+    Q = normalize_mat(gs(m))
+    return Q, mat_mult(transpose(Q), m)
+
+def bench_qr(args):
+    """
+    Compares the old gram-schmidt QR-factorization against householder
+    reflections, on tall and skinny (4n x n) and square (n x n) matrices.
+    """
+    print_row('shape', 'gram-schmidt', 'householder', 'implicit Q')
+    slow_ok = True
+    for n in args.sizes:
+        for rows in (4 * n, n):
+            m = random_matrix(rows, n, seed=n)
+            gs_t = None
+            if slow_ok:
+                expected, gs_t = timed(gram_schmidt_qr, m)
+                slow_ok = gs_t < args.slow_limit
+            result, hh_t = timed(qr, m)
+            _, implicit_t = timed(qr, m, False)
+            if gs_t is not None:
+                assert all(abs(float(a) - float(b)) < 1e-6 for x, y in zip(expected, result)
+                           for row_x, row_y in zip(x, y) for a, b in zip(row_x, row_y)), \
+                    'householder and gram-schmidt disagree'
+            print_row(f'{rows}x{n}', fmt_time(gs_t), fmt_time(hh_t), fmt_time(implicit_t))
+
+
+def fraction_mat_mult(m1, m2):
+    # the old mat_mult: an inner product of fraction objects for every entry
+    m2_t = transpose(m2)
+    return [[inner_product(row, col) for col in m2_t] for row in m1]
+
+def bench_parallel(args):
+    """
+    Compares the old mat_mult on fraction objects against the scaled integer
+    one, in this process and then split between 2 up to --workers processes.
+    """
+    counts = list(range(2, args.workers + 1))
+    print_row('n', 'fractions', '1 process', *[f'{w} processes' for w in counts])
+    parallel_qt.PARALLEL_MIN_WORK = 0
+    slow_ok = True
+    for n in args.sizes:
+        m1 = random_matrix(n, n, True, seed=n)
+        m2 = random_matrix(n, n, True, seed=n + 1)
+        expected, old_t = None, None
+        if slow_ok:
+            expected, old_t = timed(fraction_mat_mult, m1, m2)
+            slow_ok = old_t < args.slow_limit
+        times = [old_t]
+        for w in [1] + counts:
+            result, t = timed(parallel_qt.mat_mult, m1, m2, w)
+            if expected is None:
+                expected = result
+            assert result == expected, f'mat_mult with {w} processes gave a different answer'
+            times.append(t)
+        print_row(n, *map(fmt_time, times))
+
+def bench_symmetric(args):
+    """
+    Compares aTa through the general mat_mult against the gram matrix
+    (only the upper triangle), then factoring the result with LU
+    against LDL^T. Integer entries keep the factorizations quick.
+    """
+    print_row('n', 'mat_mult', 'aTa', 'LU det', 'LDL det')
+    for n in args.sizes:
+        m = random_matrix(n, n, seed=n)
+        expected, general_t = timed(mat_mult, transpose(m), m)
+        result, gram_t = timed(aTa, m)
+        assert result == expected, 'aTa and mat_mult disagree'
+        lu, lu_t = timed(LUFactorization, result)
+        ldl, ldl_t = timed(LDLFactorization, result)
+        assert lu.det() == ldl.det(), 'LU and LDL^T found different determinants'
+        print_row(n, *map(fmt_time, (general_t, gram_t, lu_t, ldl_t)))
+
+def listed_det_slow(m):
+    # the old det_slow: every permutation is made (and kept) first, then they are added up
+    n = len(m)
+    perms = [list(p) for p, _ in leibniz_qt.permute(n)]
+    D = 0
+    for i, sigma in enumerate(perms):
+        D += (-1) ** i * product([m[r][sigma[r]] for r in range(n)])
+    return D
+
+def peak_memory(f, *args):
+    """
+    Calls f(*args) and finds the most memory it used at once (with tracemalloc).
+    - f is a function.
+    - Returns (result, seconds, peak) where peak is a string in MB.
+    """
+    tracemalloc.start()
+    result, t = timed(f, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, t, f'{peak / 2**20:.2f}MB'
+
+def bench_leibniz(args):
+    """
+    Compares making every permutation first and then adding up the terms
+    of the leibniz formula against det_slow (which doesn't keep them around),
+    in this process and split between --workers processes. Sizes over 12
+    are skipped, and the old way stops after --slow-limit.
+    """
+    print_row('n', 'det', 'all listed', 'peak', 'det_slow', 'peak', f'{args.workers} processes')
+    slow_ok = True
+    for n in args.sizes:
+        if n > 12:
+            print_row(n, 'skipped')
+            continue
+        m = random_matrix(n, n, seed=n)
+        expected, det_t = timed(det, m)
+        old_t, old_peak = None, 'skipped'
+        if slow_ok:
+            result, old_t, old_peak = peak_memory(listed_det_slow, m)
+            assert result == expected, 'the old det_slow and det disagree'
+            slow_ok = old_t < args.slow_limit
+        parallel_qt.set_workers(1)
+        result, slow_t, slow_peak = peak_memory(det_slow, m)
+        assert result == expected, 'det_slow and det disagree'
+        parallel_qt.set_workers(args.workers)
+        leibniz_qt.PARALLEL_MIN_SIZE = 0
+        result, parallel_t = timed(det_slow, m)
+        assert result == expected, 'det_slow in worker processes and det disagree'
+        print_row(n, fmt_time(det_t), fmt_time(old_t), old_peak, fmt_time(slow_t), slow_peak, fmt_time(parallel_t))
+
+def bench_laplace(args):
+    """
+    Compares the three determinants: det (bareiss or modular), det_slow
+    (the leibniz formula, only up to 12 x 12) and det_laplace (laplace
+    expansion with the minors remembered). Sizes over 22 are skipped,
+    since there are 2^n minors to remember.
+    """
+    print_row('n', 'det', 'det_slow', 'det_laplace')
+    for n in args.sizes:
+        if n > 22:
+            print_row(n, 'skipped')
+            continue
+        m = random_matrix(n, n, seed=n)
+        expected, det_t = timed(det, m)
+        slow_t = None
+        if n <= 12:
+            result, slow_t = timed(det_slow, m)
+            assert result == expected, 'det_slow and det disagree'
+        result, laplace_t = timed(det_laplace, m)
+        assert result == expected, 'det_laplace and det disagree'
+        print_row(n, *map(fmt_time, (det_t, slow_t, laplace_t)))
+
+def split_parse_matrix(text):
+    # how input_funcs_qt used to read a matrix and check it (for comparison)
+    inp = text.replace(' ', '').split('\n')
+    inp = [[get_frac_from_string(n) for n in line.split(',')] for line in inp]
+    assert input_funcs_qt.is_matrix([list(row) for row in inp])
+    return inp
+
+def tokenize_matrix(text):
+    # what input_funcs_qt does now
+    m = input_funcs_qt.parse_matrix(text)
+    assert input_funcs_qt.is_matrix(m)
+    return m
+
+def bench_parse(args):
+    """
+    Compares reading pasted matrix text with split and get_frac_from_string
+    (then checking it with is_matrix) against the one pass tokenizer.
+    """
+    print_row('n', 'input', 'split', 'tokenize')
+    for n in args.sizes:
+        for rational in (False, True):
+            m = random_matrix(n, n, rational, hi=999, seed=n)
+            text = '\n'.join(', '.join(str(x) for x in row) for row in m)
+            expected, split_t = timed(split_parse_matrix, text)
+            result, tokenize_t = timed(tokenize_matrix, text)
+            assert result == expected, 'the tokenizer and split disagree'
+            print_row(n, 'rational' if rational else 'integer', fmt_time(split_t), fmt_time(tokenize_t))
+
+def write_lines(lines):
+    # writes lines to nowhere, one at a time
+    with open(os.devnull, 'w') as f:
+        for line in lines:
+            f.write(line + '\n')
+
+def bench_format(args):
+    """
+    Times formatting a matrix as one string against writing it out a
+    line at a time with iter_format_matrix, and how much memory each uses.
+    """
+    print_row('n', 'input', 'format', '(peak)', 'iter', '(peak)')
+    for n in args.sizes:
+        for rational in (False, True):
+            m = random_matrix(n, n, rational, hi=999, seed=n)
+            text, format_t, format_peak = peak_memory(format_matrix, m)
+            _, iter_t, iter_peak = peak_memory(write_lines, iter_format_matrix(m))
+            print_row(n, 'rational' if rational else 'integer', fmt_time(format_t), format_peak,
+                      fmt_time(iter_t), iter_peak)
+
+
+BENCHES = {
+    'ref': bench_ref,
+    'alloc': bench_alloc,
+    'gcd': bench_gcd,
+    'rational': bench_rational,
+    'float': bench_float,
+    'modular': bench_modular,
+    'solve': bench_solve,
+    'lu': bench_lu,
+    'eigen': bench_eigen,
+    'qr': bench_qr,
+    'parallel': bench_parallel,
+    'symmetric': bench_symmetric,
+    'symmetric-eigen': bench_symmetric_eigen,
+    'leibniz': bench_leibniz,
+    'laplace': bench_laplace,
+    'parse': bench_parse,
+    'format': bench_format,
+}
+
+# benchmarks which can't get anywhere near the usual --sizes have their own
+DEFAULT_SIZES = {
+    'laplace': [8, 12, 16, 20],
+}
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(10000)
+    parser = argparse.ArgumentParser(description='Benchmarks for the linear algebra calculator.')
+    parser.add_argument('bench', choices=BENCHES.keys())
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        help='matrix sizes to time (10 25 50 100 200 for most benchmarks)')
+    parser.add_argument('--slow-limit', type=float, default=30.0,
+                        help='stop timing the old code path once one size takes longer than this (seconds)')
+    parser.add_argument('--bits', type=int, nargs='+', default=[32, 64, 256, 1024, 4096],
+                        help='operand sizes for the gcd benchmark')
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='most processes to split the products between for the parallel benchmark')
+    args = parser.parse_args()
+    if args.sizes is None:
+        args.sizes = DEFAULT_SIZES.get(args.bench, [10, 25, 50, 100, 200])
+    BENCHES[args.bench](args)
@@ -0,0 +1,148 @@
+# caching helpers: fingerprints of vectors/matrices to use as keys, and a
+# least recently used cache to keep results in.
+
+from collections import OrderedDict
+import hashlib
+import sys
+
+import numpy as np
+
+from fraction_qt import Fraction
+from rational_matrix_qt import RationalMatrix
+
+
+def fingerprint(*args):
+    """
+    Makes a short key out of the contents of some scalars, vectors and
+    matrices. Inputs with the same entries get the same key, as long as
+    they are exact or decimal in the same places.
+    - args are scalars, vectors, matrices or rational matrices.
+    - Returns bytes (a 16 byte hash).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for a in args:
+        h.update(_describe(a).encode())
+        h.update(b';')
+    return h.digest()
+
+def _describe(a):
+    # a string that spells out everything in a
+    if isinstance(a, Fraction):
+        if a.flt:
+            return repr(float(a.numerator)) + 'd'
+        return f'{a.numerator}/{a.denominator}'
+    if isinstance(a, (list, tuple)):
+        return '[' + ','.join(_describe(n) for n in a) + ']'
+    if isinstance(a, RationalMatrix):
+        return f'R{a.shape}/{a.den}:' + ','.join(str(n) for n in a.num.ravel().tolist())
+    return repr(a)
+
+
+def estimate_size(obj, seen=None):
+    """
+    Roughly finds how many bytes an object takes up, including everything
+    it holds (lists, fraction objects, numpy arrays, and the attributes
+    of other objects). Anything shared is only counted once.
+    - obj is anything.
+    - seen is a set of the ids of objects already counted.
+    - Returns an integer.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        size = sys.getsizeof(obj) if obj.base is None else obj.nbytes
+        if obj.dtype == object:
+            size += sum(estimate_size(n, seen) for n in obj.flat)
+        return size
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, Fraction):
+        return size + estimate_size(obj._numerator, seen) + estimate_size(obj._denominator, seen)
+    if isinstance(obj, dict):
+        return size + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return size + sum(estimate_size(n, seen) for n in obj)
+    if hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            size += estimate_size(getattr(obj, slot), seen)
+    return size
+
+
+class LRUCache:
+    """
+    A dictionary which only keeps the most recently used entries, either the
+    max_items newest ones, the newest ones that fit in max_bytes, or both.
+    It counts how many lookups found something (hits) and how many didn't (misses).
+    """
+    def __init__(self, max_items=None, max_bytes=None, sizeof=estimate_size):
+        # max_items and max_bytes are positive integers or None for no limit,
+        # sizeof is the function used to find how many bytes a value takes up
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._sizes = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """
+        Finds the value stored for key, and marks it as just used.
+        - key is any hashable object.
+        - Returns the value, or default if it isn't stored.
+        """
+        if key not in self._items:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        """
+        Stores a value, throwing out the least recently used entries if
+        there are too many or they take up too much space. A value which
+        is bigger than max_bytes on its own isn't stored at all.
+        - key is any hashable object.
+        - value is anything.
+        - Returns nothing.
+        """
+        self.discard(key)
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._items[key] = value
+        self._sizes[key] = size
+        self.bytes += size
+        while ((self.max_items is not None and len(self._items) > self.max_items)
+               or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            old_key, _ = self._items.popitem(last=False)
+            self.bytes -= self._sizes.pop(old_key)
+
+    def discard(self, key):
+        """
+        Removes key from the cache if it's there.
+        - key is any hashable object.
+        - Returns nothing.
+        """
+        if key in self._items:
+            del self._items[key]
+            self.bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        self._items.clear()
+        self._sizes.clear()
+        self.bytes = 0
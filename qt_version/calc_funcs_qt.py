@@ -1,13 +1,35 @@
+from cache_qt import LRUCache, fingerprint
 from fraction_qt import Fraction
+from float_funcs_qt import has_decimals
+from householder_qt import HouseholderQR
+from integer_funcs_qt import gcd_many, lcm_many
+from leibniz_qt import leibniz_det
 from matrix_format_qt import format_matrix, format_vector, format_fraction
+from modular_funcs_qt import det_int, invert_mod_prime, solve_int
+from progress_qt import check_cancelled
+from rational_matrix_qt import RationalMatrix, accepts_rational_matrix, as_lists, as_rational
+from symmetric_qt import SymmetricMatrix, gram_matrix, is_symmetric, symmetric_bareiss
 import numpy as np
 
+import float_funcs_qt
+import parallel_qt
+
+# exact determinants of matrices at least this big are found mod a bunch of
+# primes (see modular_funcs_qt.det_int) instead of with bareiss
+MODULAR_DET_SIZE = 80
+# how many matrices orthogonal_basis remembers the basis of
+BASIS_CACHE_SIZE = 32
+
+_basis_cache = LRUCache(BASIS_CACHE_SIZE)
+
 def transpose(m):
     """
     Returns the transpose of a matrix.
     - m is a matrix.
     - Returns a matrix.
     """
+    if isinstance(m, RationalMatrix):
+        return m.transpose()
     result = [[0 for _ in range(len(m))] for _ in range(len(m[0]))]
     for i in range(len(m)):
         for j in range(len(m[0])):
@@ -20,6 +42,9 @@ def vec_add(v1, v2):
     - v1 and v2 are vectors.
     - Returns a vector (the sum of v1 and v2).
     """
+    if isinstance(v1, RationalMatrix) or isinstance(v2, RationalMatrix):
+        if (r := as_rational(v1, v2)): return r[0] + r[1]
+        v1, v2 = as_lists(v1, v2)
     result = []
     for i in range(len(v1)):
         result.append(v1[i] + v2[i])
@@ -31,6 +56,8 @@ def neg_vec(v):
     - v is a vector.
     - Returns a vector (the negation of v).
     """
+    if isinstance(v, RationalMatrix):
+        return -v
     result = []
     for i in range(len(v)):
         result.append(-v[i])
@@ -51,6 +78,10 @@ def vec_mult(v, c):
     - c is a constant (int, float, fraction).
     - Returns a vector (v * c).
     """
+    if isinstance(v, RationalMatrix):
+        if not (isinstance(c, Fraction) and c.flt) and isinstance(c, (Fraction, int, np.integer)):
+            return v * c
+        v = v.tolist()
     result = []
     for i in range(len(v)):
         result.append(v[i] * c)
@@ -63,6 +94,11 @@ def vec_mat_mult(v, m):
     - m is a matrix.
     - Returns a vector (m * v).
     """
+    if isinstance(v, RationalMatrix) or isinstance(m, RationalMatrix):
+        if (r := as_rational(m, v)): return r[0] @ r[1]
+        v, m = as_lists(v, m)
+    if not has_decimals(v, m):
+        return parallel_qt.vec_mat_mult(v, m)
     result = [0 for _ in range(len(m))]
     m_t = transpose(m)
     for i,c in enumerate(v):
@@ -75,6 +111,9 @@ def inner_product(v1, v2):
     - v1 and v2 are vectors.
     - Returns a scalar (v1 dotted with v2).
     """
+    if isinstance(v1, RationalMatrix) or isinstance(v2, RationalMatrix):
+        if (r := as_rational(v1, v2)): return r[0] @ r[1]
+        v1, v2 = as_lists(v1, v2)
     result = Fraction()
     for i in range(len(v1)):
         result += v1[i] * v2[i]
@@ -87,16 +126,15 @@ def mat_mult(m1, m2):
     - m2 is a matrix (on the right).
     - Returns a matrix (m1 * m2, in that order).
     """
-    m2_t = transpose(m2)
-    row_num = len(m1)
-    col_num = len(m2_t)
-    # create empty row_num x col_num matrix
-    result = [[0 for _ in range(col_num)] for _ in range(row_num)]
-    for i in range(row_num):
-        for j in range(col_num):
-            result[i][j] = inner_product(m1[i], m2_t[j])
-    return result
+    if has_decimals(m1, m2):
+        return float_funcs_qt.mat_mult(m1, m2)
+    if isinstance(m1, RationalMatrix) or isinstance(m2, RationalMatrix):
+        if (r := as_rational(m1, m2)): return r[0] @ r[1]
+        m1, m2 = as_lists(m1, m2)
+    # the entries are scaled to ints, and big products are split between processes
+    return parallel_qt.mat_mult(m1, m2)
 
+@accepts_rational_matrix
 def normalize_vec(v):
     """
     Normalizes a vector so that its length is 1
@@ -117,6 +155,7 @@ def normalize_vec(v):
             result.append(Fraction())
     return result
 
+@accepts_rational_matrix
 def normalize_mat(m):
     """
     Normalizes a matrix so that the length of its
@@ -131,6 +170,73 @@ def normalize_mat(m):
         result.append(normalize_vec(i))
     return transpose(result)
 
+class OrthogonalBasis:
+    """
+    An orthogonal basis that is built up one vector at a time with modified
+    gram-schmidt. Each new vector has its projection onto every vector
+    already in the basis taken off, one at a time, and the squared length
+    <u, u> of each basis vector is kept so it never has to be found again.
+    Vectors which depend on the ones before them are kept as zero vectors
+    (the same as gram-schmidt gives), and are skipped when projecting.
+    orthogonal stays True as long as every vector that was added was
+    already orthogonal to the basis (so nothing had to change).
+    """
+    def __init__(self, vectors=()):
+        # vectors is a list of vectors to start the basis with
+        self.vectors = []
+        self.norms = [] # norms[i] is <vectors[i], vectors[i]>
+        self.orthogonal = True
+        for v in vectors:
+            self.append(v)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def orthogonalize(self, v):
+        """
+        Takes the projection onto the basis off of a vector.
+        - v is a vector.
+        - Returns a vector (v - proj_basis(v)) which is orthogonal
+          to everything in the basis.
+        """
+        w = list(v)
+        for u, norm in zip(self.vectors, self.norms):
+            if norm == 0:
+                continue
+            val = inner_product(w, u) / norm
+            if val != 0:
+                w = [a - val * b for a, b in zip(w, u)]
+        return w
+
+    def append(self, v):
+        """
+        Adds the part of a vector which is orthogonal to the basis to the basis.
+        - v is a vector.
+        - Returns the vector that was added.
+        """
+        check_cancelled()
+        w = self.orthogonalize(v)
+        if self.orthogonal and w != list(v):
+            self.orthogonal = False
+        self.vectors.append(w)
+        self.norms.append(inner_product(w, w))
+        return w
+
+    def project(self, v):
+        """
+        Projects a vector onto the space spanned by the basis.
+        - v is a vector.
+        - Returns a vector (proj_basis(v)).
+        """
+        return vec_sub(v, self.orthogonalize(v))
+
+    def matrix(self):
+        """
+        Returns the basis as the columns of a matrix.
+        """
+        return transpose(self.vectors)
+
+@accepts_rational_matrix
 def gs(m):
     """
     Does the gram-schmidt algorithm on a matrix to obtain
@@ -139,33 +245,47 @@ def gs(m):
     - m is a matrix.
     - Returns a matrix (gs(m)).
     """
-    result = []
-    m_t = transpose(m)
-    col_num = len(m_t)
-    # use first column as first vector
-    for i in m_t[0]: result.append([i])
-    for i in range(col_num - 1):
-        n = i + 1
-        col = m_t[n]
-        vec = vec_add(col, neg_vec(project(col, result)))
-        for j in range(len(vec)):
-            result[j].append(vec[j])
-    return result
+    return orthogonal_basis(m).matrix()
 
-def qr(m):
+def orthogonal_basis(m):
+    """
+    Finds an OrthogonalBasis for the column space of a matrix. The basis
+    (with its squared lengths) is remembered by the matrix's fingerprint,
+    so using the same matrix again skips gram-schmidt completely.
+    - m is a matrix.
+    - Returns an OrthogonalBasis (which shouldn't be changed, since
+      it is shared).
+    """
+    key = fingerprint(m)
+    basis = _basis_cache.get(key)
+    if basis is None:
+        basis = OrthogonalBasis(transpose(m))
+        _basis_cache.put(key, basis)
+    return basis
+
+@accepts_rational_matrix
+def qr(m, explicit_q=True):
     """
     Finds a QR-factorization of a matrix, where Q is orthogonal
-    and R is upper-triangular. Creates Q with the gram-schmidt
-    algorithm and then solves for R.
+    and R is upper-triangular, with householder reflections
+    (see householder_qt.HouseholderQR). Q and R are exact when the
+    matrix has no decimals and its column lengths work out to
+    fractions, and decimals otherwise.
     - m is a matrix.
-    - Returns (Q, R) where Q is an orthogonal matrix and R is
-      an upper-triangular matrix.
+    - explicit_q is a bool for whether to build Q. If it's False, the
+      HouseholderQR is given back instead, which can multiply by Q or Q^T
+      (or build Q later) straight from the reflections.
+    - Returns (Q, R) where Q is a matrix with orthonormal columns (or a
+      HouseholderQR) and R is an upper-triangular matrix.
     """
-    ortho_m = gs(m)
-    Q = normalize_mat(ortho_m)
-    R = mat_mult(transpose(Q), m)
-    return Q,R
+    if explicit_q and has_decimals(m):
+        return float_funcs_qt.qr(m)
+    factors = HouseholderQR(m)
+    if not explicit_q:
+        return factors, factors.r()
+    return factors.q(), factors.r()
 
+@accepts_rational_matrix
 def is_orthogonal_set(m):
     """
     Determines whether a matrix is orthogonal (each column
@@ -173,41 +293,41 @@ def is_orthogonal_set(m):
     - m is a matrix.
     - Returns a bool (True if the matrix is an orthogonal set).
     """
-    m_t = transpose(m)
-    col_num = len(m_t)
-    orth = True
-    for i in range(col_num):
-        # is each column orthogonal to each other column
-        n = i + 1
-        while n < col_num:
-            if inner_product(m_t[i], m_t[n]) != 0: orth = False
-            n += 1
-    return orth
+    # gram-schmidt only leaves every column alone if they are all orthogonal already
+    return orthogonal_basis(m).orthogonal
 
+@accepts_rational_matrix
 def project(v1, s):
     """
     Projects a vector onto another vector or a subspace.
     - v1 is a vector.
-    - s is either a vector or a matrix (if a matrix, it
-      must be orthogonal).
+    - s is either a vector or a matrix (if a matrix, v1 is
+      projected onto its column space).
     - Returns a vector (proj_s(v1))
     """
-    result = [0 for _ in range(len(s))]
     if isinstance(s[0], (list, np.ndarray)): # s is a matrix
-        # s must be orthogonal matrix for this to work
-        if not is_orthogonal_set(s):
-            s_t = transpose(gs(s))
-        s_t = transpose(s)
-        for col in s_t:
-            # val is <v1, col> / <col, col>
-            val = inner_product(v1, col) / inner_product(col, col)
-            result = vec_add(result, vec_mult(col, val))
+        result = orthogonal_basis(s).project(v1)
     else:
         # val is <v1, s> / <s, s>
         val = inner_product(v1, s) / inner_product(s, s)
         result = vec_mult(s, val)
     return result
 
+@accepts_rational_matrix
+def project_many(vectors, s):
+    """
+    Projects a bunch of vectors onto the same vector or subspace, only
+    finding an orthogonal basis for it once.
+    - vectors is a list of vectors.
+    - s is either a vector or a matrix.
+    - Returns a list of vectors (proj_s(v) for each v in vectors).
+    """
+    if not isinstance(s[0], (list, np.ndarray)):
+        s = [[n] for n in s]
+    basis = orthogonal_basis(s)
+    return [basis.project(v) for v in vectors]
+
+@accepts_rational_matrix
 def diagonal_product(m):
     """
     Finds the product along the diagonal of a square matrix.
@@ -223,30 +343,195 @@ def diagonal_product(m):
 def det(m):
     """
     Finds the determinant of a square matrix using Gaussian Elimination.
+    If m has no decimals in it, fraction-free (Bareiss) elimination is used
+    so that no fractions are created along the way, or for big matrices the
+    determinant is found mod many primes and put back together with the
+    chinese remainder theorem. Otherwise numpy does it.
     - m is a square matrix.
     - Returns a scalar (det(m)).
     """
     if len(m) != len(m[0]):
         return 0
-    reduced, d = ref(m, True)
-    determinant = diagonal_product(reduced) * d
-    return determinant
+    if has_decimals(m):
+        return float_funcs_qt.det(m)
+    if not is_exact(m):
+        reduced, d = ref_gauss(m, True)
+        return diagonal_product(reduced) * d
+    rows, scales = clear_denominators(m)
+    if len(rows) >= MODULAR_DET_SIZE:
+        return Fraction(det_int(rows), product(scales))
+    rows, _, _, d = bareiss(rows)
+    # the last pivot of bareiss is the determinant of the scaled matrix
+    return Fraction(rows[-1][-1] * d, product(scales))
 
 def aTa(m):
     """
     Multiplies a matrix by its tranpose (on the left). The resulting
-    matrix is square and symmetric.
+    matrix is square and symmetric, so it is marked as a SymmetricMatrix.
     - m is a matrix.
     - Returns a square symmetric matrix (m^T * m).
     """
-    mT = transpose(m)
-    result = mat_mult(mT, m)
-    return result
+    if isinstance(m, RationalMatrix):
+        return m.T @ m
+    if has_decimals(m):
+        return SymmetricMatrix(float_funcs_qt.mat_mult(transpose(m), m))
+    if not is_exact(m):
+        return SymmetricMatrix(mat_mult(transpose(m), m))
+    # only the entries on and above the diagonal are worked out
+    return gram_matrix(m)
 
+@accepts_rational_matrix
 def ref(m, return_d=False):
     """
     Finds row-echelon form of a matrix (while keeping track 
     of row operations for use in determinant calculation).
+    Uses fraction-free elimination when m has no decimals in it,
+    and regular Gaussian Elimination otherwise.
+    - m is a matrix.
+    - return_d is a bool for whether to return the product of the row
+      operations' effect on the determinant.
+    - Returns a matrix (ref(m)) and, if return_d is True,
+      also returns either 1 or -1 depending on the number
+      of row swaps (for use in calculating determinant).
+    """
+    if is_exact(m):
+        return ref_bareiss(m, return_d)
+    return ref_gauss(m, return_d)
+
+def is_exact(m):
+    """
+    Determines whether every entry of a matrix is an exact number
+    (an int or a fraction object that isn't a decimal).
+    - m is a matrix.
+    - Returns a bool.
+    """
+    if isinstance(m, RationalMatrix):
+        return True
+    for row in m:
+        for n in row:
+            if isinstance(n, Fraction):
+                if n.flt: return False
+            elif not isinstance(n, (int, np.integer)):
+                return False
+    return True
+
+def clear_denominators(m):
+    """
+    Scales each row of a matrix by the lcm of the denominators in that
+    row so that every entry becomes an integer.
+    - m is a matrix of exact numbers (see is_exact).
+    - Returns (rows, scales) where rows is a list of lists of ints and
+      scales[i] is the number row i of m was multiplied by.
+    """
+    if isinstance(m, RationalMatrix):
+        return [[int(n) for n in row] for row in m.num], [m.den for _ in range(len(m))]
+    rows = []
+    scales = []
+    for row in m:
+        scale = lcm_many([n.denominator for n in row if isinstance(n, Fraction)])
+        if scale == 1:
+            rows.append([int(n.numerator) if isinstance(n, Fraction) else int(n) for n in row])
+        else:
+            rows.append([int(n.numerator) * (scale // n.denominator) if isinstance(n, Fraction)
+                         else int(n) * scale for n in row])
+        scales.append(scale)
+    return rows, scales
+
+def bareiss(rows):
+    """
+    Does fraction-free (Bareiss) Gaussian Elimination on a matrix of ints.
+    Every step multiplies through by the current pivot and then divides
+    exactly by the previous one, so all of the intermediate numbers stay
+    integers (they are all minors of the original matrix). Row swaps and
+    skipped columns are chosen exactly like in ref_gauss.
+    - rows is a list of lists of ints (it is not modified).
+    - Returns (result, divisors, order, d) where result is a row echelon form
+      of rows made of ints, divisors[i] is the number row i of result has to
+      be divided by to get the row that ref_gauss would find, order[i] is the
+      index of the row of rows that ended up in position i, and d is either 1
+      or -1 depending on the number of row swaps.
+    """
+    lead = 0
+    d = 1
+    prev = 1 # previous pivot
+    rank = 0
+    row_num = len(rows)
+    col_num = len(rows[0])
+    result = [x[:] for x in rows]
+    order = list(range(row_num))
+    divisors = [1 for _ in range(row_num)]
+    for r in range(row_num):
+        check_cancelled(r, row_num)
+        if col_num <= lead:
+            break
+        i = r
+        while result[i][lead] == 0:
+            i += 1
+            if i == row_num:
+                i = r
+                lead += 1
+                if lead == col_num:
+                    break
+        if lead == col_num:
+            break
+        if i != r: d *= -1
+        result[r], result[i] = result[i], result[r]
+        order[r], order[i] = order[i], order[r]
+
+        pivot_row = result[r]
+        pivot = pivot_row[lead]
+        divisors[r] = prev
+        for i in range(r + 1, row_num):
+            row = result[i]
+            mult = row[lead]
+            if mult == 0:
+                # only the pivot scaling happens, which divides out exactly
+                if prev != pivot:
+                    for k in range(lead, col_num):
+                        row[k] = row[k] * pivot // prev
+                continue
+            for k in range(lead, col_num):
+                row[k] = (row[k] * pivot - pivot_row[k] * mult) // prev
+        prev = pivot
+        rank += 1
+        lead += 1
+    # rows that never became pivot rows are all zeros, but keep them consistent anyway
+    for i in range(rank, row_num):
+        divisors[i] = prev
+    return result, divisors, order, d
+
+@accepts_rational_matrix
+def ref_bareiss(m, return_d=False):
+    """
+    Finds the same row-echelon form as ref_gauss, but uses fraction-free
+    elimination (see bareiss) and only creates a fraction once per entry at
+    the very end.
+    - m is a matrix of exact numbers (see is_exact).
+    - return_d is a bool for whether to return the product of the row
+      operations' effect on the determinant.
+    - Returns a matrix (ref(m)) and, if return_d is True, also returns
+      either 1 or -1 depending on the number of row swaps.
+    """
+    rows, scales = clear_denominators(m)
+    rows, divisors, order, d = bareiss(rows)
+    result = []
+    for i, row in enumerate(rows):
+        div = divisors[i] * scales[order[i]]
+        # take out whatever the whole row has in common with div first
+        common = gcd_many(row + [div])
+        if common > 1:
+            div //= common
+            row = [n // common for n in row]
+        result.append([Fraction(n, div) for n in row])
+    if return_d: return result, d
+    return result
+
+@accepts_rational_matrix
+def ref_gauss(m, return_d=False):
+    """
+    Finds row-echelon form of a matrix using Gaussian Elimination on
+    fraction objects (while keeping track of row operations for use
+    in determinant calculation).
     - m is a matrix.
     - return_d is a bool for whether to return the product of the row
       operations' effect on the determinant.
@@ -260,6 +545,7 @@ def ref(m, return_d=False):
     row_num = len(m)
     result = [x[:] for x in m] # copy m without referencing it
     for r in range(row_num): # iterate through the rows
+        check_cancelled(r, row_num)
         if col_num <= lead:
             if return_d: return result, d
             return result
@@ -290,6 +576,7 @@ def ref(m, return_d=False):
     if return_d: return result, d
     return result
 
+@accepts_rational_matrix
 def rref(m):
     """
     Finds reduced row echelon form of a matrix.
@@ -301,6 +588,7 @@ def rref(m):
     row_num = len(m)
     result = [x[:] for x in m] # copy m without referencing it
     for r in range(row_num): # iterate through all rows
+        check_cancelled(r, row_num)
         if col_num <= lead:
             return result
         
@@ -332,7 +620,45 @@ def rref(m):
         lead += 1
     return result
 
+@accepts_rational_matrix
 def solve(b, A):
+    """
+    Solves matrix equation Ax = b for x. Uses Dixon's p-adic lifting
+    (see solve_dixon) when A and b have no decimals in them, and numpy
+    otherwise.
+    - b is a vector.
+    - A is a matrix.
+    - Returns a vector (the solution to Ax = b, if it exists). If no solution
+      exists, returns 0.
+    """
+    if len(A) != len(A[0]): return 0
+    if has_decimals(b, A):
+        return float_funcs_qt.solve(b, A)
+    if not (is_exact(A) and is_exact([b])):
+        return solve_rref(b, A)
+    return solve_dixon(b, A)
+
+@accepts_rational_matrix
+def solve_dixon(b, A):
+    """
+    Solves matrix equation Ax = b for x exactly with Dixon's p-adic lifting
+    (see modular_funcs_qt.solve_int). A is only ever inverted mod a prime,
+    so no fractions are created until the very end.
+    - b is a vector of exact numbers.
+    - A is a square matrix of exact numbers.
+    - Returns a vector (the solution to Ax = b, if it exists). If no solution
+      exists, returns 0.
+    """
+    # clearing the denominators of [A | b] row by row doesn't change the solution
+    rows, _ = clear_denominators([list(row) + [n] for row, n in zip(A, b)])
+    solution = solve_int([row[:-1] for row in rows], [row[-1] for row in rows])
+    if solution is None:
+        return 0
+    nums, den = solution
+    return [Fraction(n, den) for n in nums]
+
+@accepts_rational_matrix
+def solve_rref(b, A):
     """
     Solves matrix equation Ax = b for x using Gauss-Jordan Elimination (RREF).
     - b is a vector.
@@ -350,26 +676,317 @@ def solve(b, A):
     sol = sol[-1] # solution is the last column of rref
     return sol
 
+@accepts_rational_matrix
 def inverse(A):
     """
-    Finds the inverse of a matrix using Gauss-Jordan Elimination (RREF).
+    Finds the inverse of a matrix. Uses fraction-free Gauss-Jordan
+    Elimination (see bareiss_inverse) when A has no decimals in it, and
+    numpy otherwise. Whether A is invertible comes from the elimination
+    itself, so there's no need to find det(A) first.
     - A is a matrix.
     - Returns a matrix (A^-1, if it exists). If there is no inverse,
       returns 0.
     """
-    if len(A) != len(A[0]) or det(A) == 0:
+    if len(A) != len(A[0]):
         return 0 # inverse DNE
-    n = len(A)
-    A_t = transpose(A)
-    iden = identity(n)
-    for i in iden:
-        A_t.append(i)
-    aug_A = transpose(A_t) # A with identity columns augmented on
-    sol = transpose(rref(aug_A))
-    if sol[:len(A)] != identity(len(A)):
+    if has_decimals(A):
+        return float_funcs_qt.inverse(A)
+    if not is_exact(A):
+        return inverse_rref(A)
+    rows, scales = clear_denominators(A)
+    result = bareiss_inverse(rows, scales)
+    if result is None:
         return 0
-    sol = sol[-len(A):]
-    return transpose(sol)
+    adj, d = result
+    return [[Fraction(n, d) for n in row] for row in adj]
+
+def bareiss_inverse(rows, scales):
+    """
+    Does fraction-free Gauss-Jordan Elimination on [rows | S], where S is the
+    diagonal matrix of scales. Every row (above and below the pivot) is
+    multiplied by the current pivot and divided exactly by the previous one,
+    so everything stays an integer and the left half ends up as d * I.
+    If rows is SA, the right half is then d * A^-1.
+    - rows is a square list of lists of ints (it is not modified).
+    - scales is a list of ints (use all 1s to just invert rows).
+    - Returns (result, d) where result is a list of lists of ints and
+      result / d is the inverse, or None as soon as a column has no pivot
+      (the matrix isn't invertible).
+    """
+    n = len(rows)
+    width = 2 * n
+    # the augmented matrix is filled in once and reduced in place
+    aug = [row + [0] * n for row in rows]
+    for i in range(n):
+        aug[i][n + i] = scales[i]
+    prev = 1
+    for k in range(n):
+        check_cancelled(k, n)
+        i = k
+        while aug[i][k] == 0:
+            i += 1
+            if i == n:
+                return None
+        aug[k], aug[i] = aug[i], aug[k]
+        pivot_row = aug[k]
+        pivot = pivot_row[k]
+        for i in range(n):
+            if i == k:
+                continue
+            row = aug[i]
+            mult = row[k]
+            if mult == 0:
+                if prev != pivot:
+                    for j in range(k + 1, width):
+                        row[j] = row[j] * pivot // prev
+                continue
+            for j in range(k + 1, width):
+                row[j] = (row[j] * pivot - pivot_row[j] * mult) // prev
+            row[k] = 0
+        prev = pivot
+    return [row[n:] for row in aug], prev
+
+@accepts_rational_matrix
+def inverse_rref(A):
+    """
+    Finds the inverse of a matrix with Gauss-Jordan Elimination on [A | I],
+    giving up as soon as a column has no pivot.
+    - A is a square matrix.
+    - Returns a matrix (A^-1, if it exists). If there is no inverse,
+      returns 0.
+    """
+    n = len(A)
+    width = 2 * n
+    aug = [list(row) + [Fraction(int(i == j)) for j in range(n)] for i, row in enumerate(A)]
+    for k in range(n):
+        check_cancelled(k, n)
+        i = k
+        while aug[i][k] == 0:
+            i += 1
+            if i == n:
+                return 0 # inverse DNE
+        aug[k], aug[i] = aug[i], aug[k]
+        pivot_row = aug[k]
+        pivot = pivot_row[k]
+        for j in range(k, width):
+            pivot_row[j] /= pivot
+        for i in range(n):
+            if i == k:
+                continue
+            row = aug[i]
+            mult = row[k]
+            if mult == 0:
+                continue
+            for j in range(k, width):
+                row[j] -= pivot_row[j] * mult
+    return [row[n:] for row in aug]
+
+def pivot_tolerance(a):
+    """
+    Finds how small a pivot of a float elimination on a has to be to count
+    as 0. Rounding leaves a pivot that should be 0 at around n * eps * max|a|
+    instead of exactly 0, and dividing by it gives answers around 1e15.
+    - a is a square numpy float array.
+    - Returns a float.
+    """
+    return len(a) * np.finfo(float).eps * float(np.abs(a).max(initial=0.0))
+
+class LUFactorization:
+    """
+    A PA = LU factorization of a square matrix, which is found once and can
+    then be used to solve Ax = b for lots of different b, or find det(A) and
+    A^-1, without doing the elimination again.
+    If A has no decimals in it the elimination is done exactly with bareiss,
+    otherwise L and U are numpy float arrays found with partial pivoting.
+    Exact solves use Dixon's p-adic lifting (like solve_dixon) instead of
+    substituting, since that is a lot faster, so only the pivots (the
+    diagonal of U, for det) are kept from the exact elimination, along with
+    the inverse of A mod p that the lifting needs.
+    """
+    def __init__(self, A):
+        # A is a square matrix
+        if isinstance(A, RationalMatrix):
+            A = A.tolist()
+        if len(A) != len(A[0]):
+            raise ValueError('Only square matrices have an LU factorization here.')
+        self.n = len(A)
+        self.exact = not has_decimals(A) and is_exact(A)
+        if self.exact:
+            self._factor_exact(A)
+        else:
+            self._factor_float(A)
+
+    def _factor_exact(self, A):
+        # PSA = LU where S scales the rows so that there are no denominators
+        self.rows, self.scales = clear_denominators(A)
+        self.mod_inverse = None
+        result, divisors, self.order, self.sign = bareiss(self.rows)
+        # only the diagonal of U is kept (for det), solving and the inverse use mod_inverse
+        self.pivots = [Fraction(result[i][i], divisors[i]) for i in range(self.n)]
+        self.singular = any(x == 0 for x in self.pivots)
+
+    def _factor_float(self, A):
+        # L (without its 1s) and U are both kept in lu
+        lu = float_funcs_qt.to_array(A)
+        n = self.n
+        tol = pivot_tolerance(lu)
+        order = np.arange(n)
+        sign = 1
+        self.singular = False
+        for k in range(n):
+            check_cancelled(k, n)
+            i = k + int(np.argmax(np.abs(lu[k:, k])))
+            if abs(lu[i, k]) <= tol:
+                self.singular = True
+                break
+            if i != k:
+                lu[[k, i]] = lu[[i, k]]
+                order[[k, i]] = order[[i, k]]
+                sign = -sign
+            lu[k + 1:, k] /= lu[k, k]
+            lu[k + 1:, k + 1:] -= np.outer(lu[k + 1:, k], lu[k, k + 1:])
+        self.lu = lu
+        self.order = order
+        self.sign = sign
+
+    def is_singular(self):
+        return self.singular
+
+    def det(self):
+        """
+        Finds the determinant from the diagonal of U.
+        - Returns a scalar (det(A)).
+        """
+        if self.singular:
+            return Fraction() if self.exact else Fraction(0.0)
+        if self.exact:
+            return product(self.pivots) * self.sign / product(self.scales)
+        return Fraction(float(np.prod(np.diag(self.lu)) * self.sign))
+
+    def solve(self, b):
+        """
+        Solves Ax = b, with forward and back substitution for decimals
+        or p-adic lifting for exact numbers.
+        - b is a vector.
+        - Returns a vector (x), or 0 if A isn't invertible.
+        """
+        if self.singular:
+            return 0
+        if isinstance(b, RationalMatrix):
+            b = b.tolist()
+        if not self.exact or has_decimals(b):
+            if self.exact:
+                # A is exact but b isn't, so the answer will be decimals anyway
+                return float_funcs_qt.solve(b, self._exact_matrix())
+            return float_funcs_qt.from_array(self._substitute_float(float_funcs_qt.to_array(b)))
+        # SAx = Sb, and Sb needs its denominators cleared too, which scales x by c
+        sb = [n * s for n, s in zip(b, self.scales)]
+        c = lcm_many([n.denominator for n in sb if isinstance(n, Fraction)])
+        rhs = [n.numerator * (c // n.denominator) if isinstance(n, Fraction) else int(n) * c for n in sb]
+        if self.mod_inverse is None:
+            self.mod_inverse = invert_mod_prime(self.rows)
+        nums, den = solve_int(self.rows, rhs, self.mod_inverse)
+        return [Fraction(n, den * c) for n in nums]
+
+    def solve_many(self, B):
+        """
+        Solves AX = B, where each column of B is a different b.
+        - B is a matrix with as many rows as A.
+        - Returns a matrix (X), or 0 if A isn't invertible.
+        """
+        if self.singular:
+            return 0
+        if isinstance(B, RationalMatrix):
+            B = B.tolist()
+        if not self.exact:
+            return float_funcs_qt.from_array(self._substitute_float(float_funcs_qt.to_array(B)))
+        return transpose([self.solve(b) for b in transpose(B)])
+
+    def inverse(self):
+        """
+        Finds A^-1 by solving AX = I.
+        - Returns a matrix (A^-1), or 0 if A isn't invertible.
+        """
+        return self.solve_many(identity(self.n))
+
+    def _substitute_float(self, b):
+        # forward and back substitution on a numpy vector or matrix b
+        lu = self.lu
+        y = b[self.order].copy()
+        for i in range(1, self.n):
+            y[i] -= lu[i, :i] @ y[:i]
+        for i in range(self.n - 1, -1, -1):
+            y[i] = (y[i] - lu[i, i + 1:] @ y[i + 1:]) / lu[i, i]
+        return y
+
+    def _exact_matrix(self):
+        # puts A back together from its scaled rows (only needed for decimal b's)
+        return [[Fraction(n, scale) for n in row] for row, scale in zip(self.rows, self.scales)]
+
+class LDLFactorization(LUFactorization):
+    """
+    The LU-factorization of a symmetric matrix, found as A = LDL^T so only
+    about half of the elimination has to be done (U is just D * L^T).
+    No rows are swapped, so it only works when none of the leading minors
+    of A are 0 (for example M^T * M when the columns of M are independent),
+    and raises ValueError otherwise. Exact matrices use symmetric_bareiss,
+    and decimal ones use numpy's cholesky (which needs A to be positive
+    definite). Solving, det and the inverse work the same as LUFactorization.
+    """
+    def _factor_exact(self, A):
+        # one common denominator is cleared, so the rows stay symmetric
+        n = self.n
+        scale = lcm_many([x.denominator for row in A for x in row if isinstance(x, Fraction)])
+        self.rows = [[x.numerator * (scale // x.denominator) if isinstance(x, Fraction) else int(x) * scale
+                      for x in row] for row in A]
+        self.scales = [scale for _ in range(n)]
+        self.mod_inverse = None
+        reduced = symmetric_bareiss(self.rows)
+        if reduced is None:
+            raise ValueError('That matrix needs row swaps, so it has no LDL^T factorization.')
+        result, divisors = reduced
+        self.order = list(range(n))
+        self.sign = 1
+        self.pivots = [Fraction(result[i][i], divisors[i]) for i in range(n)]
+        self.singular = False
+
+    def _factor_float(self, A):
+        a = float_funcs_qt.to_array(A)
+        try:
+            l = np.linalg.cholesky(a)
+        except np.linalg.LinAlgError:
+            raise ValueError('That matrix is not positive definite, so it has no cholesky factorization.')
+        d = np.diag(l)
+        if np.min(d * d) <= pivot_tolerance(a):
+            # a pivot (d^2 is the diagonal of U) is 0 up to rounding, so A is singular
+            # (lu isn't needed then, det and inverse check singular first)
+            self.lu = None
+            self.order = np.arange(self.n)
+            self.sign = 1
+            self.singular = True
+            return
+        # A = LL^T, which is (L/d) * (d*L^T) with 1s on the diagonal of the first one,
+        # kept together in lu the same way LUFactorization keeps L and U
+        self.lu = np.tril(l / d, -1) + (l * d).T
+        self.order = np.arange(self.n)
+        self.sign = 1
+        self.singular = False
+
+def factorize(A):
+    """
+    Finds the LU-factorization of a square matrix, with LDLFactorization
+    if it is symmetric (and that works) or LUFactorization otherwise.
+    - A is a square matrix.
+    - Returns an LUFactorization.
+    """
+    if isinstance(A, RationalMatrix):
+        A = A.tolist()
+    if is_symmetric(A):
+        try:
+            return LDLFactorization(A)
+        except ValueError:
+            pass
+    return LUFactorization(A)
 
 def identity(n):
     """
@@ -381,21 +998,23 @@ def identity(n):
     i = [[Fraction(int(i == j)) for i in range(n)] for j in range(n)]
     return i
 
-def eigen_matrix(m):
+@accepts_rational_matrix
+def eigen_matrix(m, return_info=False):
     """
-    Does the QR-algorithm on a matrix and returns the resulting
-    upper-triangular matrix (with eigenvalues of the original matrix
-    on the diagonal (hopefully)).
-    - m is a matrix.
-    - Returns an upper-triangular matrix with (hopefully) the eigenvalues
-      of m on the diagonal.
+    Reduces a matrix to hessenberg form and does the shifted QR-algorithm
+    on it until it has converged (see eigen_funcs_qt.schur), or if it is
+    symmetric reduces it to tridiagonal form and does the QL-algorithm on
+    that (see eigen_funcs_qt.symmetric_eigen). This always works with decimals.
+    - m is a square matrix.
+    - return_info is a bool for whether to also return the eigenvalues,
+      the number of QR (or QL) steps, whether it converged and the eigenvectors.
+    - Returns an upper-triangular matrix with the eigenvalues of m on the
+      diagonal, except for 2x2 blocks on the diagonal where m has complex
+      eigenvalues. If return_info is True, returns
+      (matrix, eigenvalues, iterations, converged, eigenvectors) where
+      eigenvectors is None unless m is symmetric.
     """
-    q,r = qr(m)
-    for _ in range(500):
-        A_n = mat_mult(r,q)
-        q,r = qr(A_n)
-    return A_n
-
+    return float_funcs_qt.eigen_matrix(m, return_info)
 
 if __name__ == "__main__":
     mat1 = [
@@ -433,56 +1052,6 @@ if __name__ == "__main__":
 # v this is old slow determinant stuff, it does work but it's a million times slower than the version using REF. keeping it around cause it's still cool af that it works.
 
 # ---- slow determinant helper funcs ----
-def find_mobile_int(l, d):
-    """
-    Finds the largest "mobile" integer and its position, where
-    mobile means it is pointed at an integer which is smaller than
-    it.
-    - l is a list containing integers from 1 to some number n, with no repeating
-      entries.
-    - d is a list of the same size as l representing the direction the integers
-      in l are pointing. 1 means pointed right, -1 means pointed left.
-    - Returns an integer representing the current position of the largest
-      mobile integer in l.
-    """
-    current_max = 0
-    current_pos = -1
-    for n in range(len(l)):
-        index = n + d[n]
-        if index < len(l):
-            pointing_at = l[index]
-        else: continue
-        if index != -1 and l[n] > pointing_at and l[n] > current_max:
-            current_max = l[n]
-            current_pos = n
-    return current_pos
-
-def permute(n):
-    """
-    Creates a permutation matrix using the Johnston-Trotter algorithm with rows as 
-    permutations of the list [1, 2, .. , n]. The number of rows in the matrix is n! 
-    (n factorial). The index of the row is the number of row-swaps needed to get there.
-    - n is an integer (size of the list).
-    - Returns a matrix containing all the permutations of the list [1, 2, .. , n].
-    """
-    initial = [1 + i for i in range(n)]
-    directions = [-1 for i in range(n)]
-    # -1 is left, 1 is right
-    final_list = [initial.copy()]
-    while (pos := find_mobile_int(initial, directions)) >= 0:
-        # there exists a mobile integer in the list
-        mobile_int = initial[pos]
-        adj = pos + directions[pos]
-        # swap it with the int it's pointing at
-        initial[pos], initial[adj] = initial[adj], initial[pos]
-        directions[pos], directions[adj] = directions[adj], directions[pos]
-        # reverse directions of ints larger than mobile_int
-        for i in range(len(initial)):
-            if initial[i] > mobile_int:
-                directions[i] *= -1
-        final_list.append(initial.copy())
-    return final_list
-
 def product(a):
     """
     Finds the product of all the items in a list.
@@ -494,25 +1063,76 @@ def product(a):
         result *= n
     return result
 
+@accepts_rational_matrix
 def det_slow(m):
     """
-    Finds the determinant of a square matrix using the 
-    leibniz formula (very slow for large matrices).
+    Finds the determinant of a square matrix using the
+    leibniz formula (very slow for large matrices). The permutations
+    are gone through a few at a time instead of all being made first
+    (see leibniz_qt), and split between processes for big matrices.
+    - m is a matrix.
+    - Returns a scalar (det(m)).
+    """
+    if len(m) != len(m[0]):
+        return 0
+    if not is_exact(m):
+        return Fraction(float(leibniz_det(float_funcs_qt.to_array(m))))
+    # D is the sum over each permutation sigma of the product of m[i][sigma[i]],
+    # which is scaled by the product of the row scales once the denominators are cleared
+    rows, scales = clear_denominators(m)
+    return Fraction(leibniz_det(rows), product(scales))
+
+def laplace_expansion(rows):
+    """
+    Finds the determinant of a square matrix by laplace (cofactor) expansion,
+    remembering the determinant of every minor so each one is only found
+    once. The minor made of the first k rows and some set of k columns is
+    expanded along its last row into minors of the first k - 1 rows, and the
+    sets of columns are kept as bitmasks, so there are 2^n minors and n steps
+    for each instead of n! steps. There is no division, so ints stay ints.
+    - rows is a square matrix of python ints (or floats).
+    - Returns an int (or float), det(rows).
+    """
+    n = len(rows)
+    # minors[mask] is the determinant of the first k rows and the columns in mask (k of them)
+    minors = {0: 1}
+    for k in range(1, n + 1):
+        check_cancelled(k - 1, n)
+        row = rows[k - 1]
+        # the entries of this row that aren't 0, with their columns as bits
+        entries = [(1 << j, x) for j, x in enumerate(row) if x != 0]
+        next_minors = {}
+        for count, mask in enumerate(minors):
+            if count % 4096 == 0:
+                check_cancelled()
+            minor = minors[mask]
+            if minor == 0:
+                continue
+            for bit, x in entries:
+                if mask & bit:
+                    continue
+                new_mask = mask | bit
+                # the column is at position t in new_mask, so the cofactor sign is (-1)^(k - 1 + t)
+                t = (mask & (bit - 1)).bit_count()
+                term = x * minor if (k - 1 + t) % 2 == 0 else -x * minor
+                next_minors[new_mask] = next_minors.get(new_mask, 0) + term
+        minors = next_minors
+    return minors.get((1 << n) - 1, 0)
+
+@accepts_rational_matrix
+def det_laplace(m):
+    """
+    Finds the determinant of a square matrix by laplace expansion with the
+    minors remembered (see laplace_expansion), as a second cross-check on det
+    which uses no division. Exact matrices have their denominators cleared
+    the same way det does it, so the expansion only uses ints.
     - m is a matrix.
     - Returns a scalar (det(m)).
     """
-    """ returns determinant of square n x n matrix m. using leibniz formula. """
     if len(m) != len(m[0]):
         return 0
-    n = len(m)
-    p = permute(n)
-    D = 0
-    sign = 1
-    # sign alternates btwn 1 and -1 because of the way the permutation matrix was created
-    # D is the sum over each sigma of the product of m[i][sigma[i] - 1] from i=0 to len(sigma)
-    # we do sigma[i] - 1 since matrix is indexed starting at 0 and sigma is indexes starting at 1
-    for sigma in p:
-        D += sign * product([m[i][sigma[i] - 1] for i in range(len(sigma))])
-        sign *= -1
-    return D
+    if not is_exact(m):
+        return Fraction(float(laplace_expansion(float_funcs_qt.to_array(m).tolist())))
+    rows, scales = clear_denominators(m)
+    return Fraction(laplace_expansion(rows), product(scales))
 # ---- end of determinant stuff ----
\ No newline at end of file
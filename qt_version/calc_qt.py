@@ -4,55 +4,177 @@
 
 import random
 import sys
+import traceback
 
 import numpy as np
 from PySide6 import QtCore, QtGui, QtWidgets
 
 import qt_window
+from cache_qt import LRUCache, fingerprint
 from calc_funcs_qt import *
 from fraction_qt import *
 from input_funcs_qt import *
 from matrix_format_qt import *
-
-
-class Func:
-    def __init__(self, func, active_boxes, text, info):
-        self.func = func  # this is a function
-        self.active_boxes = active_boxes  # this is a list of 4 bools
-        self.text = text  # this is a string
-        self.info = info  # this is a string
+from operations_qt import FUNCS, compute, format_result, shows_as_table
+from progress_qt import CancelToken, Cancelled, cancellable
+from result_model_qt import ResultModel
+
+# how much space the results (and LU-factorizations etc.) kept
+# around for calculating the same thing again can take up
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+# results with at least this many entries are shown in a table instead of as text
+TABLE_MIN_ENTRIES = 1024
+# the input boxes are parsed once nobody has typed in them for this long
+PARSE_DELAY_MS = 300
+# how an input box looks when what's in it can't be read
+INVALID_STYLE = 'background-color: #ffe4e4;'
+
+
+class WorkerSignals(QtCore.QObject):
+    # QRunnable isn't a QObject, so the signals live here
+    finished = QtCore.Signal(object)  # (msg, result, artifacts)
+    failed = QtCore.Signal(str)  # the message to show
+    progress = QtCore.Signal(int, int)  # (done, total)
+    cancelled = QtCore.Signal()
+
+
+class Worker(QtCore.QRunnable):
+    """
+    Runs a calculation in a QThreadPool thread. The long loops in the
+    calculation check self.token, so it can be stopped with token.cancel().
+    """
+    def __init__(self, job):
+        # job is a function with no arguments
+        super().__init__()
+        self.job = job
+        self.signals = WorkerSignals()
+        self.token = CancelToken(self.reportProgress)
+        self.lastProgress = None
+
+    def reportProgress(self, done, total):
+        # only send a signal when the percentage changes, so the window isn't flooded
+        percent = done * 100 // total
+        if percent != self.lastProgress:
+            self.lastProgress = percent
+            self.signals.progress.emit(percent, 100)
+
+    def run(self):
+        try:
+            with cancellable(self.token):
+                output = self.job()
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except ValueError as e:
+            self.signals.failed.emit(str(e))
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(f'{type(e).__name__}: {e}')
+        else:
+            self.signals.finished.emit(output)
+
+
+class InputParser(QtCore.QObject):
+    """
+    Keeps the text in one of the input boxes parsed. Every edit restarts a
+    short timer, and once the typing stops the text is parsed in the
+    background, only reading the lines which changed since last time. The
+    box is tinted (with the error as its tooltip) if the text can't be read,
+    and calculate uses the parsed value instead of reading the box again.
+    """
+    def __init__(self, box, parse, pool):
+        # box is a QLineEdit or QTextEdit, parse is parse_vector or parse_matrix,
+        # pool is the QThreadPool to parse in
+        super().__init__(box)
+        self.box = box
+        self.parse = parse
+        self.pool = pool
+        # what parse_row returned for each line that's been read (see tokenize)
+        self.known = {}
+        # the text that was parsed last, and what parse returned for it
+        self.text = ''
+        self.value = 0
+        # the Worker doing the parsing, or None
+        self.worker = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PARSE_DELAY_MS)
+        self.timer.timeout.connect(self.startParse)
+        box.textChanged.connect(lambda *args: self.timer.start())
+
+    def startParse(self):
+        if self.worker is not None:
+            # one at a time, the next one starts when this one is done
+            return
+        text = get_text(self.box)
+        if text == self.text:
+            return
+        # the worker gets its own copy, so this thread can keep using self.known
+        known = dict(self.known)
+        self.worker = Worker(lambda: (text, self.parse(text, known), known))
+        self.worker.signals.finished.connect(self.parseFinished)
+        self.worker.signals.failed.connect(self.parseFailed)
+        self.pool.start(self.worker)
+
+    def parseFinished(self, output):
+        text, value, known = output
+        self.worker = None
+        self.known = known
+        if text == get_text(self.box):
+            self.text = text
+            self.value = value
+            self.showValidity()
+        else:
+            # it was edited while this was being parsed
+            self.startParse()
+
+    def parseFailed(self, error_msg):
+        # calculate will parse it again and show the error
+        self.worker = None
+
+    def get(self):
+        """
+        - Returns the parsed value of the text in the box (parsing it now
+          if it has changed since the last parse).
+        """
+        text = get_text(self.box)
+        if text != self.text:
+            self.timer.stop()
+            self.value = self.parse(text, self.known)
+            self.text = text
+            self.showValidity()
+        return self.value
+
+    def showValidity(self):
+        if isinstance(self.value, str):
+            self.box.setStyleSheet(INVALID_STYLE)
+            self.box.setToolTip(self.value)
+        else:
+            self.box.setStyleSheet('')
+            self.box.setToolTip('')
 
 
 class MainWindow(qt_window.calcWindow):
     def __init__(self):
         super().__init__()
         self.currentResult = Fraction()
+        # results are kept under ('result', operation, fingerprint of the text in the boxes it uses),
+        # and things that other operations can reuse under ('artifact', 'LU' or 'REF', fingerprint of M1)
+        self.resultCache = LRUCache(max_bytes=RESULT_CACHE_BYTES)
+        # the Worker doing the current calculation, or None
+        self.worker = None
         self.clip = QtGui.QClipboard()
         self.errorDialog = QtWidgets.QMessageBox()
         self.errorDialog.setIcon(QtWidgets.QMessageBox.Critical)
         self.errorDialog.setText("Something went wrong:")
         self.errorDialog.setWindowTitle("Error")
-        self.FUNCS = {
-            'Add':                     Func(vec_add,        [1, 1, 0, 0],  'v1 + v2 =\n',                             'Adds v1 and v2 together.'),
-            'Subtract':                Func(vec_sub,        [1, 1, 0, 0],  'v1 - v2 =\n',                             'Subtracts v2 from v1.'),
-            'Matrix-Vector Multiply':  Func(vec_mat_mult,   [1, 0, 1, 0],  'M1 * v1 =\n',                             'Multiplies M1 by v1.'),
-            'Inner Product':           Func(inner_product,  [1, 1, 0, 0],  '<v1, v2> =\n',                            'Inner product (aka dot product) of v1 and v2 (multiplies components and adds them). For example, if v1 = [a, b] and v2 = [c, d] the inner product is ac + bd.'),
-            'Determinant':             Func(det,            [0, 0, 1, 0],  'Det(M1) =\n',                             'Takes the determinant of M1. Only works if M1 is square. Uses Gaussian Elimination, so it is pretty fast.'),
-            'Determinant (slow)':      Func(det_slow,       [0, 0, 1, 0],  'Det(M1) =\n',                             'Takes the determinant of M1. Only works if M1 is square. Uses the Leibniz formula, which works incredibly slow for large matrices (if a matrix is n x n, the computer must perform more than n factorial operations).'),
-            'REF':                     Func(ref,            [0, 0, 1, 0],  'REF(M1) =\n',                             'Puts M1 into row echelon form (upper triangular). If there is a 0 on one of the diagonals, the matrix is not invertible.'),
-            'RREF':                    Func(rref,           [0, 0, 1, 0],  'RREF(M1) =\n',                            'Puts M1 into reduced row echelon form (1 on the diagonals where possible). If there is a 0 on one of the diagonals, the matrix is not invertible.'),
-            'Solve Ax = b':            Func(solve,          [1, 0, 1, 0],  'x = \n',                                  'Uses Gaussian Elimination (via row reduction) to solve Ax = b, where A is M1 and b is v1. Does not work if the matrix is not invertible.'),
-            'Inverse':                 Func(inverse,        [0, 0, 1, 0],  'M1^(-1) =\n',                             'Finds the inverse of M1 using Gaussian Elimination (via row reduction). If det(M1) = 0, there is no inverse.'),
-            'Matrix Multiply':         Func(mat_mult,       [0, 0, 1, 1],  'M1 * M2 =\n',                             'Multiplies M1 by M2 (on the right).'),
-            'Project (vec on vec)':    Func(project,        [1, 1, 0, 0],  'Proj_{v2}(v1) =\n',                       'Projects v1 onto v2.'),
-            'Project (vec on mat)':    Func(project,        [1, 0, 1, 0],  'Proj_{M1}(v1) =\n',                       'Projects v1 onto the subspace spanned by the columns of M1.'),
-            'M^T * M':                 Func(aTa,            [0, 0, 1, 0],  'M^T * M =\n',                             'Multiplies the transpose of M1 by M1 (on the right). The resulting matrix is both square and symmetric.'),
-            'GS Algorithm':            Func(gs,             [0, 0, 1, 0],  'orthogonal matrix\n(spans col(M1))\n',    'The Gram Schmidt Algorithm is an algorithm which produces an orthogonal matrix which spans the same column space as the given matrix. It steals the first column of the original matrix, then uses a projection of the subsequent columns onto the current result to create orthogonal columns.'),
-            'QR-Factorization':        Func(qr,             [0, 0, 1, 0],  'Q,R =\n',                                 'Factorizes M1 into Q and R, where Q is orthogonal and R is upper-triangular.'),
-            'Normalize Vector':        Func(normalize_vec,  [1, 0, 0, 0],  'norm(v1) =\n',                            'Normalizes v1.'),
-            'Normalize Matrix':        Func(normalize_mat,  [0, 0, 1, 0],  'norm(M1) =\n',                            'Normalizes the columns of M1.'),
-            'Eigen Matrix':            Func(eigen_matrix,   [0, 0, 1, 0],  'eigenvalues on diagonal:\n',              'Uses the QR-algorithm to create a (hopefully) upper-triangular matrix with the eigenvalues of M1 on the diagonal. May not work all of the time depending on M1, does not work if M1 has complex eigenvalues.')
-        }
+        # the boxes are parsed in their own pool, so they don't wait on a calculation
+        self.parsePool = QtCore.QThreadPool(self)
+        self.parsePool.setMaxThreadCount(1)
+        self.parsers = [InputParser(self.v1, parse_vector, self.parsePool),
+                        InputParser(self.v2, parse_vector, self.parsePool),
+                        InputParser(self.m1, parse_matrix, self.parsePool),
+                        InputParser(self.m2, parse_matrix, self.parsePool)]
+        self.FUNCS = FUNCS
         self.cb.addItems([*[key for key in self.FUNCS]])
 
     def dropdownEvent(self, drop_index):
@@ -62,9 +184,47 @@ class MainWindow(qt_window.calcWindow):
             boxes[i].setEnabled(active[i])
         self.active_boxes = active
 
+    def showResult(self, op, msg, result, key=None):
+        """
+        Puts a result in the result box (or the table if it's big), and remembers it.
+        - op is the name of the operation the result is from.
+        - msg is the string to show (from format_result).
+        - result is the scalar, vector or matrix that msg shows.
+        - key is the key to cache (msg, result) under, or None to not cache it.
+        """
+        if key is not None:
+            self.resultCache.put(key, (msg, result))
+        if shows_as_table(op, result, TABLE_MIN_ENTRIES):
+            self.showTable(msg, result)
+        else:
+            self.showText(msg)
+        self.currentResult = result
+        self.updateCacheLabel()
+
+    def showText(self, msg):
+        self.resultStack.setCurrentWidget(self.resultBox)
+        self.resultBox.clear()
+        self.resultBox.insertPlainText(msg)
+
+    def showTable(self, title, result):
+        # only the cells that are scrolled to get formatted
+        old_model = self.resultTable.model()
+        self.resultTable.setModel(ResultModel(result, self.resultTable))
+        if old_model is not None:
+            old_model.deleteLater()
+        rows, cols = self.resultTable.model().rows, self.resultTable.model().cols
+        self.resultTableTitle.setText(f'{title.strip()}  ({rows} x {cols})')
+        self.resultStack.setCurrentWidget(self.resultTablePage)
+
+    def updateCacheLabel(self):
+        cache = self.resultCache
+        self.cacheLabel.setText(f'cache: {cache.hits} hits, {cache.misses} misses, '
+                                f'{cache.bytes / (1024 * 1024):.1f} MB')
+
     def clearText(self):
         for t in self.textBoxes:
             t.clear()
+        self.resultStack.setCurrentWidget(self.resultBox)
 
     def calculate(self):
         # things to check:
@@ -76,86 +236,101 @@ class MainWindow(qt_window.calcWindow):
         # projecting on to a matrix, vec must have same # of rows as matrix (since we do inner product with cols of matrix)
         # matvec multiplication, vec must have same # of rows as matrix has columns
         # matrix multiplication, M1 has same # of cols as M2 has rows.
+        if self.worker is not None:
+            # only one calculation at a time
+            return
         current_op = self.cb.currentText()
-        current_func = self.FUNCS[current_op]
-        f = current_func.func
-        active_items = current_func.active_boxes
+        active_items = self.FUNCS[current_op].active_boxes
 
-        v1 = return_vector(self.v1)
-        v2 = return_vector(self.v2)
-        m1 = return_matrix(self.m1)
-        m2 = return_matrix(self.m2)
+        # only the boxes that are being used, these are usually parsed already
+        v1, v2, m1, m2 = [parser.get() if active else 0 for parser, active in zip(self.parsers, active_items)]
 
         # only check active boxes for errors
-        errored = False
-        error_msg = ""
-        for i in zip((v1, v2, m1, m2), self.active_boxes):
+        for i in zip((v1, v2, m1, m2), active_items):
             # i is a tuple that looks like (v1, True)
             # if no error, v1 should be a list of fractions
             # if error, it should be a string
             if i[1] and isinstance(i[0], str):
-                errored = True
                 self.errorDialog.setInformativeText(i[0])
                 self.errorDialog.exec()
-
-        if active_items == [1, 1, 0, 0]:
-            if not isinstance((a := valid_vecs(v1, v2)), str):
-                result = f(v1, v2)
-            else:
-                errored = True
-                error_msg += a
-
-        elif active_items == [1, 0, 1, 0]:
-            if not isinstance((a := matvec_valid(v1, m1, current_op)), str):
-                result = f(v1, m1)
-            else:
-                errored = True
-                error_msg += a
-
-        elif active_items == [1, 0, 0, 0]:
-            if is_vector(v1):
-                result = f(v1)
-            else:
-                errored = True
-                error_msg += "The input (v1) is not a vector."
-
-        elif active_items == [0, 0, 1, 0]:
-            if not isinstance((a := mat_valid(m1, current_op)), str):
-                if f == qr:
-                    result_1, result_2 = f(m1)
-                    msg = current_func.text
-                    msg += format_answer(result_1) + '\n'
-                    msg += format_answer(result_2)
-                    self.resultBox.clear()
-                    self.resultBox.insertPlainText(msg)
-                    return
-                result = f(m1)
-            else:
-                errored = True
-                error_msg += a
-
-        elif active_items == [0, 0, 1, 1]:
-            if not isinstance((a := valid_mats(m1, m2)), str):
-                result = f(m1, m2)
-            else:
-                errored = True
-                error_msg += a
-
-        else:
-            # error
-            print('something went wrong.')
+                return
+
+        # the result only depends on the operation and the text in the boxes it uses
+        # (as typed, since without the spaces "1 2" would look the same as "12")
+        boxes = (self.v1, self.v2, self.m1, self.m2)
+        key = ('result', current_op, fingerprint(*[get_text(b) for b, active in zip(boxes, active_items) if active]))
+        cached = self.resultCache.get(key)
+        if cached is not None:
+            self.showResult(current_op, *cached)
             return
-
-        if errored:
-            self.errorDialog.setInformativeText(error_msg)
-            self.errorDialog.exec()
-            return
-
-        msg = current_func.text
-        msg += format_answer(result)
-        self.resultBox.clear()
-        self.resultBox.insertPlainText(msg)
-        self.currentResult = result
+        m1_key = fingerprint(get_text(self.m1))
+
+        # anything that can be reused from the cache is looked up here, since
+        # the cache is only touched from this thread
+        lu = self.resultCache.get(('artifact', 'LU', m1_key))
+        ref_d = None
+        if self.FUNCS[current_op].lu_method == 'det' and lu is None:
+            # the determinant is easy to get from REF(M1) if that's been found already
+            ref_d = self.resultCache.get(('artifact', 'REF', m1_key))
+
+        self.startWorker(lambda: compute(current_op, v1, v2, m1, m2, m1_key, lu, ref_d, TABLE_MIN_ENTRIES), key)
+
+    def startWorker(self, job, key):
+        """
+        Runs a calculation in the background, with the cancel button and
+        progress bar hooked up to it.
+        - job is a function with no arguments returning (msg, result, artifacts).
+        - key is the key to cache the result under.
+        """
+        worker = Worker(job)
+        worker.signals.progress.connect(self.workerProgress)
+        worker.signals.finished.connect(lambda output: self.workerFinished(output, key))
+        worker.signals.failed.connect(self.workerFailed)
+        worker.signals.cancelled.connect(self.workerCancelled)
+        self.worker = worker
+        self.calculateBtn.setEnabled(False)
+        self.cancelBtn.setEnabled(True)
+        # busy until the calculation says how far along it is
+        self.progressBar.setRange(0, 0)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def cancelCalculation(self):
+        if self.worker is not None:
+            self.worker.token.cancel()
+            self.cancelBtn.setEnabled(False)
+
+    def workerProgress(self, done, total):
+        self.progressBar.setRange(0, total)
+        self.progressBar.setValue(done)
+
+    def workerFinished(self, output, key):
+        msg, result, artifacts = output
+        self.workerDone()
+        for k, v in artifacts:
+            self.resultCache.put(k, v)
+        # key is ('result', operation, fingerprint)
+        self.showResult(key[1], msg, result, key)
+
+    def workerFailed(self, error_msg):
+        self.workerDone()
+        self.errorDialog.setInformativeText(error_msg)
+        self.errorDialog.exec()
+
+    def workerCancelled(self):
+        self.workerDone()
+        self.showText('Cancelled.')
+
+    def workerDone(self):
+        self.worker = None
+        self.calculateBtn.setEnabled(True)
+        self.cancelBtn.setEnabled(False)
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(0)
+
+    def closeEvent(self, event):
+        # don't keep the program open waiting for a calculation nobody will see
+        self.cancelCalculation()
+        super().closeEvent(event)
 
     def randomVec(self):
         m = self.mSpin.value()
@@ -228,10 +403,8 @@ class MainWindow(qt_window.calcWindow):
         else:
             # current result is a scalar
             result = dec_to_frac_approx(self.currentResult)
-        self.currentResult = result
-        msg = self.FUNCS[self.cb.currentText()].text
-        self.resultBox.clear()
-        self.resultBox.insertPlainText(msg + format_answer(result))
+        op = self.cb.currentText()
+        self.showResult(op, format_result(op, result, TABLE_MIN_ENTRIES), result)
 
     def toDecimal(self):
         if self.FUNCS[self.cb.currentText()].func == qr:
@@ -254,10 +427,8 @@ class MainWindow(qt_window.calcWindow):
         else:
             # current result is a scalar
             result = Fraction(float(self.currentResult))
-        self.currentResult = result
-        msg = self.FUNCS[self.cb.currentText()].text
-        self.resultBox.clear()
-        self.resultBox.insertPlainText(msg + format_answer(result))
+        op = self.cb.currentText()
+        self.showResult(op, format_result(op, result, TABLE_MIN_ENTRIES), result)
 
     def maxRandValueChanged(self, v):
         if self.maxRand.value() < self.minRand.value():
@@ -0,0 +1,250 @@
+# runs the calculator's operations without the window, on files of inputs.
+# run from this folder, for example:
+#   python cli_qt.py Determinant matrices.txt
+#   python cli_qt.py "Matrix Multiply" left.txt right.txt --jobs 4 --format jsonl
+#   python cli_qt.py --list
+# every file has one input for each problem. a .jsonl (or .ndjson) file has one
+# json value on each line: a list (a vector), a list of lists (a matrix), or a
+# string in the same text the calculator's boxes take. any other file (like a
+# .txt or .csv) is in the calculator's text (one row per line, commas between
+# the numbers) with a blank line between problems. problem i uses input i from
+# each file, which go with the boxes the operation uses in the order
+# v1, v2, M1, M2. '-' reads from stdin. the results are printed as soon as
+# each one is done, in order, with how long it took.
+
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+
+from fraction_qt import Fraction
+from input_funcs_qt import parse_matrix, parse_vector
+from operations_qt import FUNCS, compute
+import parallel_qt
+
+BOX_NAMES = ('v1', 'v2', 'M1', 'M2')
+# with --jobs, at most this many problems per process are read ahead of the one being printed
+PROBLEMS_PER_JOB = 4
+
+
+def find_op(name):
+    """
+    Finds an operation by its name in the dropdown, ignoring case if there isn't an exact match.
+    - name is a string.
+    - Returns the name of the operation (a key of FUNCS), or None if there isn't one.
+    """
+    if name in FUNCS:
+        return name
+    for op in FUNCS:
+        if op.lower() == name.lower():
+            return op
+    return None
+
+def json_to_text(value):
+    """
+    Converts an input from a json line to the calculator's text.
+    - value is a string, number, list, or list of lists.
+    - Returns a string.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        if value and isinstance(value[0], list):
+            return '\n'.join(', '.join(str(n) for n in row) for row in value)
+        return ', '.join(str(n) for n in value)
+    return str(value)
+
+def read_text_inputs(lines):
+    """
+    Splits the calculator's text into one input for each problem.
+    - lines is an iterable of strings (like a file).
+    - Yields strings, one for each block of lines between blank lines.
+    """
+    block = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            block.append(line)
+        elif block:
+            yield '\n'.join(block)
+            block = []
+    if block:
+        yield '\n'.join(block)
+
+def read_json_inputs(lines):
+    """
+    - lines is an iterable of strings (like a file), each a json value.
+    - Yields strings in the calculator's text, one for each line that isn't blank.
+    """
+    for line in lines:
+        if line.strip():
+            yield json_to_text(json.loads(line))
+
+def read_inputs(path):
+    """
+    Reads the inputs in a file one problem at a time (the file is never all read at once).
+    - path is the name of a file, or '-' for stdin.
+    - Yields strings in the calculator's text.
+    """
+    json_lines = path.endswith(('.jsonl', '.ndjson'))
+    if path == '-':
+        yield from (read_json_inputs if json_lines else read_text_inputs)(sys.stdin)
+        return
+    with open(path) as f:
+        yield from (read_json_inputs if json_lines else read_text_inputs)(f)
+
+def to_json(result):
+    """
+    Converts a result to something json can write. Exact numbers are kept
+    exact: ints stay ints and fractions become strings like "1/2".
+    - result is a scalar, vector, matrix, or a tuple of those.
+    - Returns an int, float, string, or list.
+    """
+    if isinstance(result, Fraction):
+        if result.flt:
+            return result.decimal()
+        if result.denominator == 1:
+            return result.numerator
+        return str(result)
+    if hasattr(result, 'tolist'):
+        result = result.tolist()
+    if isinstance(result, (list, tuple)):
+        return [to_json(n) for n in result]
+    return result
+
+
+def solve(problem):
+    """
+    Runs one problem. This is what the worker processes do with --jobs.
+    - problem is (index, op, texts) where texts has the calculator's text for
+      each box the operation uses (or None if that file ran out of inputs).
+    - Returns a dict with the problem's number, how long it took in seconds, and
+      either the result (as text and as json) or the error message.
+    """
+    index, op, texts = problem
+    start = time.perf_counter()
+    record = {'problem': index}
+    try:
+        inputs = [0, 0, 0, 0]
+        boxes = [i for i, active in enumerate(FUNCS[op].active_boxes) if active]
+        for box, text in zip(boxes, texts):
+            if text is None:
+                raise ValueError(f'There is no input for {BOX_NAMES[box]}.')
+            inputs[box] = parse_vector(text) if box < 2 else parse_matrix(text)
+            if isinstance(inputs[box], str):
+                raise ValueError(inputs[box])
+        msg, result, _ = compute(op, *inputs)
+        record['text'] = msg
+        record['result'] = to_json(result)
+    except ValueError as e:
+        record['error'] = str(e)
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+        record['traceback'] = traceback.format_exc()
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+def _init_job():
+    # each job is already its own process, so the products shouldn't start any more
+    sys.setrecursionlimit(10000)
+    parallel_qt.set_workers(1)
+
+def run(problems, jobs=1):
+    """
+    Runs problems one after another, or in a pool of processes.
+    - problems is an iterable of what solve takes (it is read as the
+      problems are run, not all at once).
+    - jobs is how many processes to run them in (1 runs them in this one).
+    - Yields what solve returns for each problem, in the same order.
+    """
+    if jobs == 1:
+        yield from map(solve, problems)
+        return
+    context = multiprocessing.get_context(parallel_qt.START_METHOD)
+    pool = ProcessPoolExecutor(jobs, mp_context=context, initializer=_init_job)
+    try:
+        pending = deque()
+        for problem in problems:
+            pending.append(pool.submit(solve, problem))
+            if len(pending) >= jobs * PROBLEMS_PER_JOB:
+                # the oldest one is printed first even if later ones are done
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+def print_record(record, fmt, op):
+    """
+    Writes the result of one problem to stdout.
+    - record is what solve returned.
+    - fmt is 'text' or 'jsonl'.
+    - op is the name of the operation.
+    """
+    if fmt == 'jsonl':
+        record = {'op': op, **record}
+        record.pop('traceback', None)
+        print(json.dumps(record), flush=True)
+        return
+    header = f'problem {record["problem"]} ({record["seconds"]:.4f}s)'
+    if 'error' in record:
+        print(f'{header}: error: {record["error"]}')
+        if 'traceback' in record:
+            print(record['traceback'], file=sys.stderr)
+    else:
+        print(f'{header}:\n{record["text"]}')
+    print(flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Runs the linear algebra calculator on files of inputs.')
+    parser.add_argument('op', nargs='?', help='the operation, as it is named in the dropdown (see --list)')
+    parser.add_argument('inputs', nargs='*',
+                        help='a file for each box the operation uses (in the order v1, v2, M1, M2), or - for stdin')
+    parser.add_argument('--list', action='store_true', help='list the operations and the boxes they use')
+    parser.add_argument('--format', choices=('text', 'jsonl'), default='text',
+                        help='print the results like the calculator does, or as one json object per line')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='how many processes to run the problems in')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, func in FUNCS.items():
+            boxes = ', '.join(box for box, active in zip(BOX_NAMES, func.active_boxes) if active)
+            print(f'{name:<24} {boxes}')
+        return 0
+    if args.op is None:
+        parser.error('an operation is needed (see --list)')
+    op = find_op(args.op)
+    if op is None:
+        parser.error(f'there is no operation called {args.op!r} (see --list)')
+    boxes = [box for box, active in zip(BOX_NAMES, FUNCS[op].active_boxes) if active]
+    if len(args.inputs) != len(boxes):
+        parser.error(f'{op} needs a file for each of {", ".join(boxes)}')
+    if args.inputs.count('-') > 1:
+        parser.error('only one input can come from stdin')
+    if args.jobs < 1:
+        parser.error('there has to be at least one job')
+
+    texts = itertools.zip_longest(*[read_inputs(path) for path in args.inputs])
+    problems = ((i, op, t) for i, t in enumerate(texts, 1))
+    start = time.perf_counter()
+    count = failed = 0
+    for record in run(problems, args.jobs):
+        print_record(record, args.format, op)
+        count += 1
+        failed += 'error' in record
+    print(f'{count} problems in {time.perf_counter() - start:.4f}s ({failed} failed)', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(10000)
+    sys.exit(main())
@@ -0,0 +1,373 @@
+# eigenvalue engine for eigen_matrix. the matrix is first reduced to upper
+# hessenberg form, then the shifted QR-algorithm is run on it, splitting off
+# eigenvalues (or 2x2 blocks with complex eigenvalues) from the bottom as soon
+# as the entry below the diagonal above them is small enough.
+
+import math
+
+import numpy as np
+
+from progress_qt import check_cancelled
+
+# an entry below the diagonal counts as 0 once it's this small compared to its neighbours
+EIGEN_TOLERANCE = np.finfo(float).eps
+# the QR-algorithm gives up after this many steps per eigenvalue
+MAX_ITERATIONS_PER_EIGENVALUE = 30
+# if nothing has split off after this many steps in a row, try a made up shift
+EXCEPTIONAL_SHIFT_AFTER = 10
+
+
+def _householder(x):
+    # unit vector v so that (I - 2vv^T)x only has a first entry, or None if x is all zeros
+    alpha = np.linalg.norm(x)
+    if alpha == 0:
+        return None
+    v = np.array(x, dtype=float)
+    v[0] += alpha if v[0] >= 0 else -alpha
+    return v / np.linalg.norm(v)
+
+def _givens(a, b):
+    # (c, s) so that [c s; -s c] * [a; b] = [r; 0]
+    r = np.hypot(a, b)
+    if r == 0:
+        return 1.0, 0.0
+    return a / r, b / r
+
+def hessenberg(a):
+    """
+    Reduces a square matrix to upper hessenberg form (zeros below the
+    first subdiagonal) with householder reflections. The result is
+    similar to a, so it has the same eigenvalues.
+    - a is a square 2-d numpy array (it is not modified).
+    - Returns a 2-d numpy array.
+    """
+    h = np.array(a, dtype=float)
+    n = len(h)
+    for k in range(n - 2):
+        check_cancelled()
+        v = _householder(h[k + 1:, k])
+        if v is None:
+            continue
+        h[k + 1:, k:] -= 2 * np.outer(v, v @ h[k + 1:, k:])
+        h[:, k + 1:] -= 2 * np.outer(h[:, k + 1:] @ v, v)
+        h[k + 2:, k] = 0.0
+    return h
+
+def block_eigenvalues(block):
+    """
+    Finds the eigenvalues of a 2x2 matrix from its characteristic polynomial.
+    - block is a 2x2 numpy array.
+    - Returns a tuple of 2 eigenvalues (floats if they are real, otherwise
+      complex conjugates with the positive imaginary part first).
+    """
+    (a, b), (c, d) = block
+    mid = (a + d) / 2
+    disc = (a - d) * (a - d) / 4 + b * c
+    if disc >= 0:
+        root = np.sqrt(disc)
+        return float(mid + root), float(mid - root)
+    root = np.sqrt(-disc)
+    return complex(mid, root), complex(mid, -root)
+
+def _wilkinson_shift(h, hi):
+    # the eigenvalue of the bottom 2x2 block closest to the bottom corner,
+    # or None if that block has complex eigenvalues
+    l1, l2 = block_eigenvalues(h[hi - 1:hi + 1, hi - 1:hi + 1])
+    if isinstance(l1, complex):
+        return None
+    d = h[hi, hi]
+    return l1 if abs(l1 - d) <= abs(l2 - d) else l2
+
+def _shifted_step(h, lo, hi, mu):
+    # one QR step on rows/columns lo to hi with shift mu (H - mu*I = QR, H = RQ + mu*I),
+    # using givens rotations. the rest of h gets the same rotations so it stays similar
+    for k in range(lo, hi + 1):
+        h[k, k] -= mu
+    rotations = []
+    for k in range(lo, hi):
+        c, s = _givens(h[k, k], h[k + 1, k])
+        top = h[k, k:].copy()
+        bottom = h[k + 1, k:]
+        h[k, k:] = c * top + s * bottom
+        h[k + 1, k:] = c * bottom - s * top
+        h[k + 1, k] = 0.0
+        rotations.append((c, s))
+    for k, (c, s) in zip(range(lo, hi), rotations):
+        left = h[:k + 2, k].copy()
+        right = h[:k + 2, k + 1]
+        h[:k + 2, k] = c * left + s * right
+        h[:k + 2, k + 1] = c * right - s * left
+    for k in range(lo, hi + 1):
+        h[k, k] += mu
+
+def _francis_step(h, lo, hi):
+    # one implicit double shift QR step on rows/columns lo to hi (at least 3 of them),
+    # shifted by both (complex) eigenvalues of the bottom 2x2 block at once so
+    # everything stays real
+    s = h[hi - 1, hi - 1] + h[hi, hi]
+    t = h[hi - 1, hi - 1] * h[hi, hi] - h[hi - 1, hi] * h[hi, hi - 1]
+    x = h[lo, lo] * h[lo, lo] + h[lo, lo + 1] * h[lo + 1, lo] - s * h[lo, lo] + t
+    y = h[lo + 1, lo] * (h[lo, lo] + h[lo + 1, lo + 1] - s)
+    z = h[lo + 1, lo] * h[lo + 2, lo + 1]
+    for k in range(lo, hi - 1):
+        v = _householder((x, y, z))
+        if v is not None:
+            r = max(lo, k - 1)
+            h[k:k + 3, r:] -= 2 * np.outer(v, v @ h[k:k + 3, r:])
+            top = min(k + 4, hi + 1)
+            h[:top, k:k + 3] -= 2 * np.outer(h[:top, k:k + 3] @ v, v)
+        x = h[k + 1, k]
+        y = h[k + 2, k]
+        if k < hi - 2:
+            z = h[k + 3, k]
+    v = _householder((x, y))
+    if v is not None:
+        h[hi - 1:hi + 1, hi - 2:] -= 2 * np.outer(v, v @ h[hi - 1:hi + 1, hi - 2:])
+        h[:hi + 1, hi - 1:hi + 1] -= 2 * np.outer(h[:hi + 1, hi - 1:hi + 1] @ v, v)
+    # the bulge chasing leaves rounding errors below the subdiagonal
+    for k in range(lo, hi - 1):
+        h[k + 2:hi + 1, k] = 0.0
+
+def _split_block(h, hi):
+    # rotates the 2x2 block ending at hi (which has real eigenvalues) so it is
+    # upper-triangular. returns its eigenvalues
+    l1, l2 = block_eigenvalues(h[hi - 1:hi + 1, hi - 1:hi + 1])
+    a, b = h[hi - 1, hi - 1], h[hi - 1, hi]
+    c, d = h[hi, hi - 1], h[hi, hi]
+    # an eigenvector for l1, from whichever row of (block - l1*I) is bigger
+    if abs(b) + abs(l1 - a) >= abs(c) + abs(l1 - d):
+        x, y = b, l1 - a
+    else:
+        x, y = l1 - d, c
+    cs, sn = _givens(x, y)
+    top = h[hi - 1, hi - 1:].copy()
+    bottom = h[hi, hi - 1:]
+    h[hi - 1, hi - 1:] = cs * top + sn * bottom
+    h[hi, hi - 1:] = cs * bottom - sn * top
+    left = h[:hi + 1, hi - 1].copy()
+    right = h[:hi + 1, hi]
+    h[:hi + 1, hi - 1] = cs * left + sn * right
+    h[:hi + 1, hi] = cs * right - sn * left
+    h[hi, hi - 1] = 0.0
+    return h[hi - 1, hi - 1], h[hi, hi]
+
+def schur(a, tol=EIGEN_TOLERANCE, max_iterations=None):
+    """
+    Finds the (real) schur form of a square matrix with the shifted
+    QR-algorithm. The matrix is reduced to hessenberg form first so each
+    step is cheap, then each step uses a wilkinson shift (the eigenvalue of
+    the bottom 2x2 block closest to the bottom corner), or a double shift when
+    that block has complex eigenvalues. Eigenvalues are split off from the
+    bottom as soon as the entry below the diagonal next to them is smaller
+    than tol (compared to the diagonal around it).
+    - a is a square 2-d numpy array.
+    - tol is a float.
+    - max_iterations is the most QR steps to do, by default
+      MAX_ITERATIONS_PER_EIGENVALUE for each eigenvalue.
+    - Returns (T, eigenvalues, iterations, converged) where T is a numpy array
+      which is upper-triangular apart from 2x2 blocks on the diagonal for
+      complex conjugate eigenvalues, eigenvalues is a list of floats and
+      complex numbers in the order they are on the diagonal of T, iterations is
+      how many QR steps were done, and converged is False if it gave up (the
+      eigenvalues are only rough then).
+    """
+    h = hessenberg(a)
+    n = len(h)
+    if max_iterations is None:
+        max_iterations = MAX_ITERATIONS_PER_EIGENVALUE * max(n, 1)
+    values = [0.0 for _ in range(n)]
+    iterations = 0
+    stuck = 0
+    hi = n - 1
+    while hi >= 0:
+        # how many eigenvalues have split off so far
+        check_cancelled(n - 1 - hi, n)
+        # find where the bottom block starts (the last small subdiagonal entry)
+        lo = hi
+        while lo > 0:
+            scale = abs(h[lo - 1, lo - 1]) + abs(h[lo, lo])
+            if scale == 0:
+                scale = np.abs(h[:hi + 1, :hi + 1]).max()
+            if abs(h[lo, lo - 1]) <= tol * scale:
+                h[lo, lo - 1] = 0.0
+                break
+            lo -= 1
+        if lo == hi:
+            values[hi] = float(h[hi, hi])
+            hi -= 1
+            stuck = 0
+            continue
+        if lo == hi - 1:
+            l1, l2 = block_eigenvalues(h[hi - 1:hi + 1, hi - 1:hi + 1])
+            if not isinstance(l1, complex):
+                l1, l2 = _split_block(h, hi)
+            values[hi - 1], values[hi] = l1, l2
+            hi -= 2
+            stuck = 0
+            continue
+        if iterations == max_iterations:
+            break
+        iterations += 1
+        stuck += 1
+        if stuck % EXCEPTIONAL_SHIFT_AFTER == 0:
+            _shifted_step(h, lo, hi, h[hi, hi] + abs(h[hi, hi - 1]))
+            continue
+        mu = _wilkinson_shift(h, hi)
+        if mu is None:
+            _francis_step(h, lo, hi)
+        else:
+            _shifted_step(h, lo, hi, mu)
+    converged = hi < 0
+    for i in range(hi + 1):
+        values[i] = float(h[i, i])
+    return h, values, iterations, converged
+
+def tridiagonalize(a, vectors=False):
+    """
+    Reduces a symmetric matrix to tridiagonal form with householder
+    reflections, the symmetric version of hessenberg (each reflection is
+    a rank-2 update of the part of the matrix that's left, so only about
+    half the work).
+    - a is a symmetric 2-d numpy array (it is not modified).
+    - vectors is a bool for whether to keep track of the reflections.
+    - Returns (d, e, q) where d is the diagonal, e[i] is the entry next to
+      d[i] and d[i + 1], and q is the orthogonal matrix with q^T a q
+      tridiagonal (or None if vectors is False). d, e and q are numpy arrays.
+    """
+    t = np.array(a, dtype=float)
+    n = len(t)
+    q = np.eye(n) if vectors else None
+    for k in range(n - 2):
+        check_cancelled()
+        v = _householder(t[k + 1:, k])
+        if v is None:
+            continue
+        # H = I - 2vv^T on both sides of the bottom right block, as a rank-2 update
+        s = t[k + 1:, k + 1:]
+        p = 2 * (s @ v)
+        w = p - (v @ p) * v
+        s -= np.outer(v, w) + np.outer(w, v)
+        x = t[k + 1:, k]
+        hx = x - 2 * (v @ x) * v
+        t[k + 1:, k] = hx
+        t[k, k + 1:] = hx
+        if q is not None:
+            q[:, k + 1:] -= 2 * np.outer(q[:, k + 1:] @ v, v)
+    return np.diag(t).copy(), np.diag(t, -1).copy(), q
+
+def tridiagonal_eigen(d, e, q=None, tol=EIGEN_TOLERANCE, max_iterations=None):
+    """
+    Finds the eigenvalues of a symmetric tridiagonal matrix with the QL-algorithm
+    and implicit wilkinson shifts (like tql2 in EISPACK). Eigenvalues are split
+    off from the top as soon as the entry next to them is smaller than tol
+    (compared to the diagonal around it), which usually takes 1 or 2 steps each.
+    - d is the diagonal and e is the entries next to it (numpy arrays, see
+      tridiagonalize). They are not modified.
+    - q is a numpy array to multiply by the rotations (so its columns become
+      the eigenvectors if it was the q from tridiagonalize), or None. It is modified.
+    - tol is a float.
+    - max_iterations is the most QL steps to do, by default
+      MAX_ITERATIONS_PER_EIGENVALUE for each eigenvalue.
+    - Returns (eigenvalues, iterations, converged) where eigenvalues is a numpy array
+      in the same order as the columns of q.
+    """
+    # plain python floats are a lot faster than numpy ones one at a time
+    d = [float(x) for x in d]
+    n = len(d)
+    e = [float(x) for x in e] + [0.0]
+    # the rotations mix columns of q, which are rows of q^T (and those are next to each other in memory)
+    qt = np.ascontiguousarray(q.T) if q is not None else None
+    if max_iterations is None:
+        max_iterations = MAX_ITERATIONS_PER_EIGENVALUE * max(n, 1)
+    iterations = 0
+    converged = True
+    for l in range(n):
+        check_cancelled(l, n)
+        while True:
+            # find where the block starting at l ends (the first small entry next to the diagonal)
+            m = l
+            while m < n - 1:
+                if abs(e[m]) <= tol * (abs(d[m]) + abs(d[m + 1])):
+                    break
+                m += 1
+            if m == l:
+                break
+            if iterations == max_iterations:
+                converged = False
+                break
+            iterations += 1
+            # the wilkinson shift from the top 2x2 block, then rotations from the bottom up
+            g = (d[l + 1] - d[l]) / (2 * e[l])
+            r = math.hypot(g, 1.0)
+            g = d[m] - d[l] + e[l] / (g + math.copysign(r, g))
+            s = c = 1.0
+            p = 0.0
+            i = m - 1
+            while i >= l:
+                f = s * e[i]
+                b = c * e[i]
+                r = math.hypot(f, g)
+                e[i + 1] = r
+                if r == 0.0:
+                    # the block split in two, so start again on the top part
+                    d[i + 1] -= p
+                    e[m] = 0.0
+                    break
+                s = f / r
+                c = g / r
+                g = d[i + 1] - p
+                r = (d[i] - g) * s + 2 * c * b
+                p = s * r
+                d[i + 1] = g + p
+                g = c * r - b
+                if qt is not None:
+                    below = qt[i + 1].copy()
+                    qt[i + 1] = s * qt[i] + c * below
+                    qt[i] = c * qt[i] - s * below
+                i -= 1
+            else:
+                d[l] -= p
+                e[l] = g
+                e[m] = 0.0
+        if not converged:
+            break
+    if q is not None:
+        q[:] = qt.T
+    return np.array(d), iterations, converged
+
+def symmetric_eigen(a, vectors=True, tol=EIGEN_TOLERANCE, max_iterations=None):
+    """
+    Finds the eigenvalues (and eigenvectors) of a symmetric matrix by reducing it
+    to tridiagonal form and using the QL-algorithm on that (see tridiagonalize
+    and tridiagonal_eigen). The eigenvalues of a symmetric matrix are all real,
+    and it has orthonormal eigenvectors.
+    - a is a symmetric 2-d numpy array.
+    - vectors is a bool for whether to find the eigenvectors.
+    - tol and max_iterations are passed on to tridiagonal_eigen.
+    - Returns (eigenvalues, eigenvectors, iterations, converged) where eigenvalues
+      is a list of floats from biggest to smallest, eigenvectors is a numpy array
+      with the matching (unit) eigenvectors as its columns or None, iterations is
+      how many QL steps were done, and converged is False if it gave up.
+    """
+    d, e, q = tridiagonalize(a, vectors)
+    values, iterations, converged = tridiagonal_eigen(d, e, q, tol, max_iterations)
+    order = np.argsort(-values, kind='stable')
+    if q is not None:
+        q = q[:, order]
+    return [float(v) for v in values[order]], q, iterations, converged
+
+def format_eigenvalues(values):
+    """
+    Formats a list of eigenvalues (from schur) into a string with one on each line,
+    rounded like decimal fraction objects are.
+    - values is a list of floats and complex numbers.
+    - Returns a string.
+    """
+    lines = []
+    for v in values:
+        if isinstance(v, complex):
+            sign = '+' if v.imag >= 0 else '-'
+            lines.append(f'{round(v.real, 3)} {sign} {round(abs(v.imag), 3)}i')
+        else:
+            lines.append(str(round(v, 3)))
+    return '\n'.join(lines)
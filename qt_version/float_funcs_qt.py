@@ -0,0 +1,137 @@
+# floating point versions of the calculator's matrix operations, backed by
+# numpy (and LAPACK through numpy.linalg). calc_funcs_qt sends work here when
+# the inputs have decimals in them, since the answer can't be exact then anyway.
+
+import numpy as np
+
+from fraction_qt import Fraction
+from symmetric_qt import is_symmetric
+import eigen_funcs_qt
+
+
+def has_decimals(*args):
+    """
+    Finds out whether any of the given scalars, vectors or matrices
+    contain a decimal (a fraction object with flt set, or a float).
+    - args are scalars, vectors or matrices.
+    - Returns a bool.
+    """
+    for a in args:
+        if isinstance(a, Fraction):
+            if a.flt: return True
+        elif isinstance(a, (float, np.floating)):
+            return True
+        elif isinstance(a, list):
+            if has_decimals(*a): return True
+    return False
+
+def to_array(m):
+    """
+    Converts a vector or matrix of fraction objects to a numpy float array.
+    - m is a vector or matrix.
+    - Returns a 1-d or 2-d numpy array.
+    """
+    if isinstance(m[0], (list, np.ndarray)):
+        return np.array([[float(n) for n in row] for row in m], dtype=float)
+    return np.array([float(n) for n in m], dtype=float)
+
+def from_array(a):
+    """
+    Converts a numpy array (or number) back into decimal fraction objects.
+    - a is a 0-d, 1-d or 2-d numpy array or a float.
+    - Returns a fraction object, vector or matrix.
+    """
+    a = np.asarray(a, dtype=float)
+    make = Fraction.from_float
+    if a.ndim == 0:
+        return make(float(a))
+    if a.ndim == 1:
+        return [make(n) for n in a.tolist()]
+    return [[make(n) for n in row] for row in a.tolist()]
+
+def mat_mult(m1, m2):
+    """
+    Multiplies two matrices together.
+    - m1 and m2 are matrices.
+    - Returns a matrix (m1 * m2) of decimals.
+    """
+    return from_array(to_array(m1) @ to_array(m2))
+
+def det(m):
+    """
+    Finds the determinant of a square matrix with an LU factorization.
+    - m is a square matrix.
+    - Returns a decimal fraction object (det(m)).
+    """
+    return from_array(np.linalg.det(to_array(m)))
+
+def inverse(A):
+    """
+    Finds the inverse of a square matrix.
+    - A is a square matrix.
+    - Returns a matrix of decimals, or 0 if A isn't invertible.
+    """
+    try:
+        return from_array(np.linalg.inv(to_array(A)))
+    except np.linalg.LinAlgError:
+        return 0
+
+def solve(b, A):
+    """
+    Solves Ax = b for x.
+    - b is a vector.
+    - A is a square matrix.
+    - Returns a vector of decimals, or 0 if A isn't invertible.
+    """
+    try:
+        return from_array(np.linalg.solve(to_array(A), to_array(b)))
+    except np.linalg.LinAlgError:
+        return 0
+
+def qr_array(a):
+    """
+    Finds a QR-factorization of a numpy array where R has a
+    nonnegative diagonal (the same convention as gram-schmidt).
+    - a is a 2-d numpy array.
+    - Returns (Q, R) as numpy arrays.
+    """
+    q, r = np.linalg.qr(a)
+    signs = np.where(np.diag(r) < 0, -1.0, 1.0)
+    return q * signs, r * signs[:, None]
+
+def qr(m):
+    """
+    Finds a QR-factorization of a matrix, where Q is orthogonal
+    and R is upper-triangular.
+    - m is a matrix.
+    - Returns (Q, R) as matrices of decimals.
+    """
+    q, r = qr_array(to_array(m))
+    return from_array(q), from_array(r)
+
+def eigen_matrix(m, return_info=False):
+    """
+    Finds the (real) schur form of a square matrix with the shifted
+    QR-algorithm (see eigen_funcs_qt.schur). If m is symmetric, its
+    eigenvalues and eigenvectors are found with eigen_funcs_qt.symmetric_eigen
+    instead, and the schur form is just the eigenvalues on the diagonal.
+    - m is a square matrix.
+    - return_info is a bool for whether to also return the eigenvalues,
+      the number of QR (or QL) steps, whether it converged, and the eigenvectors.
+    - Returns a matrix of decimals which is upper-triangular with the
+      eigenvalues of m on the diagonal, apart from 2x2 blocks for complex
+      eigenvalues. If return_info is True, returns
+      (matrix, eigenvalues, iterations, converged, eigenvectors) where
+      eigenvectors is a matrix with orthonormal eigenvectors as its columns
+      (in the same order as the diagonal) if m is symmetric, otherwise None.
+    """
+    if is_symmetric(m):
+        values, vectors, iterations, converged = eigen_funcs_qt.symmetric_eigen(to_array(m), return_info)
+        t = np.diag(values)
+        if return_info:
+            return from_array(t), values, iterations, converged, from_array(vectors)
+        return from_array(t)
+    t, values, iterations, converged = eigen_funcs_qt.schur(to_array(m))
+    if return_info:
+        return from_array(t), values, iterations, converged, None
+    return from_array(t)
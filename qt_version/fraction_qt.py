@@ -1,62 +1,134 @@
 # Tynan McGee
 # 5/10/2021
 
+import fractions
+
 import numpy as np
 
-def gcd(a,b):
-    """
-    Returns the greates common divisor of a and b.
-    - a and b are integers.
-    - Returns an integer.
-    """
-    if a < 0 and b < 0:
-        a = -a
-        b = -b
-    if a < b:
-        a,b = b,a
-    r = a % b
-    if r == 0: # remainder is 0
-        return b
-    return gcd(b,r)
+from integer_funcs_qt import gcd
 
 class Fraction:
+    # slots instead of a __dict__ since we make a LOT of these.
+    # _numerator and _denominator aren't necessarily in lowest terms,
+    # the gcd is only taken when something outside of the arithmetic looks
+    # at the fraction (numerator, denominator, printing, comparing, hashing)
+    # or when the denominator gets bigger than REDUCE_LIMIT.
+    # the denominator is always positive though.
+    __slots__ = ('_numerator', '_denominator', '_reduced', 'flt')
+    REDUCE_LIMIT = 1 << 256
+
     def __init__(self, numerator=0, denominator=1):
         # numerator is a nonzero integer, denominator is a nonzero integer
+        if isinstance(numerator, np.integer): numerator = int(numerator)
+        if isinstance(denominator, np.integer): denominator = int(denominator)
         if type(numerator) == int and numerator != 0 and type(denominator) == int and denominator != 0:
-            div = gcd(numerator, denominator)
-            self.numerator = numerator // div
-            self.denominator = denominator // div
+            # change -1/-2 --> 1/2,   change 1/-2 --> -1/2
+            if denominator < 0:
+                numerator = -numerator
+                denominator = -denominator
+            self._numerator = numerator
+            self._denominator = denominator
+            self._reduced = denominator == 1
             self.flt = False
+            if denominator > Fraction.REDUCE_LIMIT:
+                self._reduce()
         # if numerator or denominator is a float, don't bother with the gcd and just do num/1
         elif isinstance(numerator, (float, np.floating)) or isinstance(denominator, (float, np.floating)):
-            self.numerator = numerator / denominator
-            self.denominator = 1
+            self._numerator = numerator / denominator
+            self._denominator = 1
+            self._reduced = True
             self.flt = True
         # if numerator is 0, do 0/1
         elif numerator == 0:
-            self.numerator = 0
-            self.denominator = 1
+            self._numerator = 0
+            self._denominator = 1
+            self._reduced = True
             self.flt = False
         elif denominator == 0:
             raise ZeroDivisionError('You had a fraction with denominator 0.')
 
-        # change -1/-2 --> 1/2,   change 1/-2 --> -1/2
-        if (self.numerator < 0 and self.denominator < 0) or (self.numerator > 0 and self.denominator < 0):
-            self.numerator = -self.numerator
-            self.denominator = -self.denominator
+    @staticmethod
+    def _make(numerator, denominator):
+        # fast constructor for the arithmetic below, skips all of the checks
+        # in __init__. numerator and denominator must be ints and denominator
+        # must be positive.
+        f = object.__new__(Fraction)
+        if numerator == 0:
+            f._numerator = 0
+            f._denominator = 1
+            f._reduced = True
+        else:
+            f._numerator = numerator
+            f._denominator = denominator
+            f._reduced = denominator == 1
+            if denominator > Fraction.REDUCE_LIMIT:
+                f._reduce()
+        f.flt = False
+        return f
+
+    @staticmethod
+    def from_float(n):
+        # fast constructor for a decimal fraction, n must be a python float
+        f = object.__new__(Fraction)
+        f._numerator = n
+        f._denominator = 1
+        f._reduced = True
+        f.flt = True
+        return f
+
+    def _reduce(self):
+        # puts the fraction into lowest terms
+        if not self._reduced:
+            div = gcd(abs(self._numerator), self._denominator)
+            if div != 1:
+                self._numerator //= div
+                self._denominator //= div
+            self._reduced = True
+
+    @property
+    def numerator(self):
+        if not self._reduced: self._reduce()
+        return self._numerator
+
+    @property
+    def denominator(self):
+        if not self._reduced: self._reduce()
+        return self._denominator
 
     def __str__(self):
         if self.denominator == 1:
-            return str(self.numerator)
-        return str(self.numerator) + '/' + str(self.denominator)
+            return str(self._numerator)
+        return str(self._numerator) + '/' + str(self._denominator)
+
+    def __hash__(self):
+        if self.flt:
+            return hash(self._numerator)
+        if self.denominator == 1:
+            return hash(self._numerator)
+        # the same hash python gives the number, so a fraction and a decimal
+        # which are equal (like 1/2 and 0.5) hash the same too
+        return hash(fractions.Fraction(self._numerator, self._denominator))
 
     def __add__(self, n):
+        if type(n) is Fraction:
+            if not (self.flt or n.flt):
+                # exact fast path, skip the checks in __init__
+                if self._denominator == n._denominator:
+                    return Fraction._make(self._numerator + n._numerator, self._denominator)
+                return Fraction._make(self._numerator * n._denominator + n._numerator * self._denominator,
+                                      self._denominator * n._denominator)
+        elif type(n) is int:
+            if not self.flt:
+                return Fraction._make(self._numerator + n * self._denominator, self._denominator)
+        # mixing with a decimal, so do things the slow way (in lowest terms)
+        self._reduce()
         if isinstance(n, Fraction):
-            if self.denominator == n.denominator:
-                return Fraction(self.numerator + n.numerator, self.denominator)
-            denom = self.denominator * n.denominator
-            a_num = n.denominator * self.numerator
-            b_num = self.denominator * n.numerator
+            n._reduce()
+            if self._denominator == n._denominator:
+                return Fraction(self._numerator + n._numerator, self._denominator)
+            denom = self._denominator * n._denominator
+            a_num = n._denominator * self._numerator
+            b_num = self._denominator * n._numerator
             num = a_num + b_num
             if type(num) == float:
                 return Fraction(num / denom)
@@ -77,15 +149,24 @@ class Fraction:
         return -self + n
 
     def __mul__(self, n):
+        if type(n) is Fraction:
+            if not (self.flt or n.flt):
+                # exact fast path, skip the checks in __init__
+                return Fraction._make(self._numerator * n._numerator, self._denominator * n._denominator)
+        elif type(n) is int:
+            if not self.flt:
+                return Fraction._make(self._numerator * n, self._denominator)
+        self._reduce()
         if isinstance(n, (int, np.integer)):
-            num = self.numerator * n
-            den = self.denominator
+            num = self._numerator * n
+            den = self._denominator
         elif isinstance(n, (float, np.floating)):
             num = self.decimal() * n
             den = 1
         elif isinstance(n, Fraction):
-            num = self.numerator * n.numerator
-            den = self.denominator * n.denominator
+            n._reduce()
+            num = self._numerator * n._numerator
+            den = self._denominator * n._denominator
         else:
             return NotImplemented
         return Fraction(num, den)
@@ -107,7 +188,7 @@ class Fraction:
         return self * -1
     
     def __abs__(self):
-        if self.numerator < 0:
+        if self._numerator < 0:
             return self * -1
         return self
 
@@ -116,49 +197,69 @@ class Fraction:
     # for example, instead of a/b < c/d, we do ad < cb
     # instead of a/b < n, we do a < nb
     # denominators are nonnegative because of the way fraction objects
-    # are constructed, so the inequality sign never switches when we multiply over
+    # are constructed, so the inequality sign never switches when we multiply over.
+    # comparing with 0 only needs the sign of the numerator, so that case
+    # doesn't bother putting the fraction in lowest terms.
     def __lt__(self, n):
         if isinstance(n, Fraction):
-            return self.numerator * n.denominator < n.numerator * self.denominator
+            self._reduce(); n._reduce()
+            return self._numerator * n._denominator < n._numerator * self._denominator
         if isinstance(n, (int, float, np.integer, np.floating)):
-            return self.numerator < self.denominator * n
+            if n == 0: return self._numerator < 0
+            self._reduce()
+            return self._numerator < self._denominator * n
         return NotImplemented
 
     def __le__(self, n):
         if isinstance(n, Fraction):
-            return self.numerator * n.denominator <= n.numerator * self.denominator
+            self._reduce(); n._reduce()
+            return self._numerator * n._denominator <= n._numerator * self._denominator
         if isinstance(n, (int, float, np.integer, np.floating)):
-            return self.numerator <= self.denominator * n
+            if n == 0: return self._numerator <= 0
+            self._reduce()
+            return self._numerator <= self._denominator * n
         return NotImplemented
 
     def __gt__(self, n):
         if isinstance(n, Fraction):
-            return self.numerator * n.denominator > n.numerator * self.denominator
+            self._reduce(); n._reduce()
+            return self._numerator * n._denominator > n._numerator * self._denominator
         if isinstance(n, (int, float, np.integer, np.floating)):
-            return self.numerator > self.denominator * n
+            if n == 0: return self._numerator > 0
+            self._reduce()
+            return self._numerator > self._denominator * n
         return NotImplemented
 
     def __ge__(self, n):
         if isinstance(n, Fraction):
-            return self.numerator * n.denominator >= n.numerator * self.denominator
+            self._reduce(); n._reduce()
+            return self._numerator * n._denominator >= n._numerator * self._denominator
         if isinstance(n, (int, float, np.integer, np.floating)):
-            return self.numerator >= self.denominator * n
+            if n == 0: return self._numerator >= 0
+            self._reduce()
+            return self._numerator >= self._denominator * n
         return NotImplemented
 
     def __eq__(self, n):
         if isinstance(n, Fraction):
-            return self.numerator * n.denominator == n.numerator * self.denominator
+            self._reduce(); n._reduce()
+            return self._numerator * n._denominator == n._numerator * self._denominator
         if isinstance(n, (int, float, np.integer, np.floating)):
-            return self.numerator == self.denominator * n
+            if n == 0: return self._numerator == 0
+            self._reduce()
+            return self._numerator == self._denominator * n
         # elif isinstance(n, str):
         #     return n == str(self)
         return False # if n isn't a number or fraction, then it's not equal
 
     def __ne__(self, n):
         if isinstance(n, Fraction):
-            return self.numerator * n.denominator != n.numerator * self.denominator
+            self._reduce(); n._reduce()
+            return self._numerator * n._denominator != n._numerator * self._denominator
         if isinstance(n, (int, float, np.integer, np.floating)):
-            return self.numerator != self.denominator * n
+            if n == 0: return self._numerator != 0
+            self._reduce()
+            return self._numerator != self._denominator * n
         # elif isinstance(n, str):
         #     return n != str(self)
         return True # if n isn't a number or fraction, then it's not equal
@@ -169,14 +270,25 @@ class Fraction:
         return len(str(self))
 
     def invert(self):
-        if self.numerator == 0:
+        if self._numerator == 0:
             return self
-        return Fraction(self.denominator, self.numerator)
+        if self.flt:
+            return Fraction(self._denominator, self._numerator)
+        f = object.__new__(Fraction)
+        if self._numerator < 0:
+            f._numerator = -self._denominator
+            f._denominator = -self._numerator
+        else:
+            f._numerator = self._denominator
+            f._denominator = self._numerator
+        f._reduced = self._reduced
+        f.flt = False
+        return f
 
     def __float__(self):
-        return self.numerator / self.denominator
+        return self._numerator / self._denominator
     def decimal(self):
-        return self.numerator / self.denominator
+        return self._numerator / self._denominator
 
 
 def get_frac_from_string(st):
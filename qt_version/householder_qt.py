@@ -0,0 +1,191 @@
+import math
+
+import numpy as np
+
+from fraction_qt import Fraction
+from progress_qt import check_cancelled
+import float_funcs_qt
+
+
+def _exact_sqrt(f):
+    # the square root of a nonnegative fraction object if it's a fraction, otherwise None
+    num, den = f.numerator, f.denominator
+    num_root = math.isqrt(num)
+    den_root = math.isqrt(den)
+    if num_root * num_root != num or den_root * den_root != den:
+        return None
+    return Fraction(num_root, den_root)
+
+
+class HouseholderQR:
+    """
+    A QR-factorization found with householder reflections. Column k is
+    reflected onto a multiple of e_k with H_k = I - tau_k * v_k * v_k^T, and
+    the reflections are stored in the same compact form LAPACK uses: R is in
+    the upper triangle of one m x n array, and each v_k (which starts with
+    an implicit 1) is below the diagonal of column k, with tau_k kept on the side.
+    So Q = H_0 H_1 ... H_(k-1) is never built unless q() is called, and
+    apply_q / apply_qt use the reflections directly.
+    The diagonal of R is made nonnegative (the same convention as gram-schmidt),
+    which flips the signs of some of the columns of Q.
+    If the matrix has no decimals in it the reflections are done with
+    fraction objects as long as every length that comes up is a fraction
+    (for example when the columns are pythagorean), so Q and R are exact.
+    Otherwise everything is done with numpy floats.
+    """
+    def __init__(self, m, exact=None):
+        # m is a matrix, exact is True/False to force a mode or None to decide automatically
+        self.m = len(m)
+        self.n = len(m[0])
+        self.k = min(self.m, self.n)
+        if exact is None:
+            exact = not float_funcs_qt.has_decimals(m)
+        self.exact = exact and self._factor_exact(m)
+        if not self.exact:
+            self._factor_float(m)
+
+    def _factor_exact(self, m):
+        # returns False as soon as a length isn't a fraction
+        a = [[n if isinstance(n, Fraction) else Fraction(n) for n in row] for row in m]
+        rows, cols = self.m, self.n
+        tau = [Fraction() for _ in range(self.k)]
+        for k in range(self.k):
+            check_cancelled(k, self.k)
+            if k == rows - 1:
+                break
+            x0 = a[k][k]
+            length_sq = Fraction()
+            for i in range(k, rows):
+                length_sq += a[i][k] * a[i][k]
+            if length_sq == 0:
+                continue
+            alpha = _exact_sqrt(length_sq)
+            if alpha is None:
+                return False
+            beta = -alpha if x0 >= 0 else alpha
+            v0 = x0 - beta
+            for i in range(k + 1, rows):
+                a[i][k] /= v0
+            tau[k] = (beta - x0) / beta
+            a[k][k] = beta
+            for j in range(k + 1, cols):
+                w = a[k][j]
+                for i in range(k + 1, rows):
+                    w += a[i][k] * a[i][j]
+                if w == 0:
+                    continue
+                w *= tau[k]
+                a[k][j] -= w
+                for i in range(k + 1, rows):
+                    a[i][j] -= w * a[i][k]
+        self.compact = a
+        self.tau = tau
+        self.signs = [-1 if a[k][k] < 0 else 1 for k in range(self.k)]
+        return True
+
+    def _factor_float(self, m):
+        a = float_funcs_qt.to_array(m)
+        rows = self.m
+        tau = np.zeros(self.k)
+        for k in range(self.k):
+            check_cancelled(k, self.k)
+            if k == rows - 1:
+                break
+            x0 = a[k, k]
+            alpha = np.linalg.norm(a[k:, k])
+            if alpha == 0:
+                continue
+            beta = -alpha if x0 >= 0 else alpha
+            a[k + 1:, k] /= x0 - beta
+            tau[k] = (beta - x0) / beta
+            a[k, k] = beta
+            v = np.concatenate(([1.0], a[k + 1:, k]))
+            a[k:, k + 1:] -= tau[k] * np.outer(v, v @ a[k:, k + 1:])
+        self.compact = a
+        self.tau = tau
+        self.signs = np.where(np.diag(a)[:self.k] < 0, -1.0, 1.0)
+
+    def _vector(self, k):
+        # v_k, with its implicit 1 at the start
+        if self.exact:
+            return [Fraction(1)] + [self.compact[i][k] for i in range(k + 1, self.m)]
+        return np.concatenate(([1.0], self.compact[k + 1:, k]))
+
+    def _reflect(self, k, x):
+        # applies H_k to the last m - k rows of x (a list or numpy array) in place
+        tau = self.tau[k]
+        if tau == 0:
+            return
+        v = self._vector(k)
+        if not self.exact:
+            x[k:] -= tau * np.outer(v, v @ x[k:]) if x.ndim == 2 else tau * (v @ x[k:]) * v
+            return
+        w = Fraction()
+        for vi, xi in zip(v, x[k:]):
+            w += vi * xi
+        if w == 0:
+            return
+        w *= tau
+        for i, vi in enumerate(v):
+            x[k + i] -= w * vi
+
+    def apply_qt(self, b):
+        """
+        Multiplies a vector by Q^T (the full m x m one) without building Q.
+        - b is a vector with m entries.
+        - Returns a vector (Q^T * b), the first k entries of which go with R.
+        """
+        x = list(b) if self.exact else float_funcs_qt.to_array(b)
+        for k in range(self.k):
+            self._reflect(k, x)
+        for k in range(self.k):
+            x[k] = x[k] * self.signs[k]
+        return self._result(x)
+
+    def apply_q(self, x):
+        """
+        Multiplies a vector by Q (the full m x m one) without building Q.
+        - x is a vector with m entries (only the first k of them go
+          with the columns of Q that q() returns).
+        - Returns a vector (Q * x).
+        """
+        y = list(x) if self.exact else float_funcs_qt.to_array(x)
+        for k in range(self.k):
+            y[k] = y[k] * self.signs[k]
+        for k in range(self.k - 1, -1, -1):
+            self._reflect(k, y)
+        return self._result(y)
+
+    def q(self):
+        """
+        Builds Q explicitly by applying the reflections to the first
+        k columns of the identity.
+        - Returns an m x k matrix with orthonormal columns.
+        """
+        if self.exact:
+            cols = []
+            for j in range(self.k):
+                e = [Fraction() for _ in range(self.m)]
+                e[j] = Fraction(1)
+                cols.append(self.apply_q(e))
+            return [[col[i] for col in cols] for i in range(self.m)]
+        q = np.eye(self.m, self.k) * self.signs
+        for k in range(self.k - 1, -1, -1):
+            self._reflect(k, q)
+        return float_funcs_qt.from_array(q)
+
+    def r(self):
+        """
+        Takes R out of the compact form.
+        - Returns a k x n upper-triangular matrix.
+        """
+        if self.exact:
+            return [[self.compact[i][j] * self.signs[i] if j >= i else Fraction()
+                     for j in range(self.n)] for i in range(self.k)]
+        r = np.triu(self.compact[:self.k]) * self.signs[:, None]
+        return float_funcs_qt.from_array(r)
+
+    def _result(self, x):
+        if self.exact:
+            return x
+        return float_funcs_qt.from_array(x)
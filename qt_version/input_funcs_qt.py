@@ -1,7 +1,44 @@
 from fraction_qt import *
 from calc_funcs_qt import det
 
+class ParsedVector(list):
+    """
+    A vector which came out of parse_vector, so it is already known to be
+    a list of fraction objects and is_vector doesn't have to look at it again.
+    """
+
+
+class ParsedMatrix(list):
+    """
+    A matrix which came out of parse_matrix, so it is already known to be a
+    list of rows of fraction objects which are all the same length, and
+    is_matrix doesn't have to look at it again.
+    """
+
+
 # -- vector/matrix retrieval and verification
+def get_text(t):
+    """
+    - t is a Qt text object (a line edit or a text edit).
+    - Returns the text in it (a string).
+    """
+    try:
+        return t.text()
+    except:
+        return t.toPlainText()
+
+def split_input(text):
+    """
+    Returns a list containing each line of text with spaces removed.
+    - text is a string containing comma separated numbers and fractions.
+    - Returns a list of those numbers (each item in the list is a line of text
+      from the input (a string)), or 0 if the text is empty.
+    """
+    inp = text.replace(' ', '')
+    inp = inp.split('\n')
+    if inp[0] == '': return 0 # string is empty
+    return inp
+
 def get_input(t):
     """
     Returns a list containing each line of text from t with spaces removed.
@@ -9,15 +46,125 @@ def get_input(t):
     - Returns a list of those numbers (each item in the list is a line of text
       from the input (a string)).
     """
+    return split_input(get_text(t))
+
+def parse_row(line):
+    """
+    Reads one line of comma separated numbers. A line of only ints (the
+    usual case) is read all at once by int() without looking at each
+    number in python.
+    - line is a string.
+    - Returns a list of fraction objects, or the column (starting at 1) of
+      the first thing in line that isn't a number.
+    """
+    cells = line.split(',')
     try:
-        inp = t.text()
-    except:
-        inp = t.toPlainText()
-    inp = inp.replace(' ', '')
-    inp = inp.split('\n')
-    if inp[0] == '': return 0 # string is empty
-    return inp
-        
+        return [Fraction._make(n, 1) for n in map(int, cells)]
+    except ValueError:
+        # there's a fraction or a decimal (or something that isn't a number) in this line
+        pass
+    row = []
+    for col, cell in enumerate(cells, 1):
+        n = _read_number(cell)
+        if n is None:
+            return col
+        row.append(n)
+    return row
+
+def tokenize(text, one_line=False, known=None):
+    """
+    Reads the numbers in text a line at a time, making each one into a
+    fraction object as soon as it's read and checking that the rows are all
+    the same length along the way.
+    - text is a string (a line of comma separated numbers for each row).
+    - one_line is a bool for whether to only read the first line.
+    - known is a dict from lines to what parse_row returned for them, or None.
+      Lines that are in it aren't read again, and the ones that aren't are
+      added to it (so only the lines that were edited since the last time
+      have to be read).
+    - Returns a list of rows (lists of fraction objects), or an error message
+      saying where the first thing that isn't a number is.
+    """
+    text = text.rstrip() # blank lines at the end (like from pasting) are fine
+    lines = [text.partition('\n')[0]] if one_line else text.split('\n')
+    if known is None:
+        known = {}
+    elif len(known) > 2 * len(lines) + 16:
+        # forget lines that were edited away a while ago
+        kept = {line: known[line] for line in lines if line in known}
+        known.clear()
+        known.update(kept)
+    rows = []
+    width = None
+    for row_num, line in enumerate(lines, 1):
+        row = known.get(line)
+        if row is None:
+            row = known[line] = parse_row(line)
+        if isinstance(row, int):
+            return _token_error(line.split(',')[row - 1], row_num, row, one_line)
+        if width is None:
+            width = len(row)
+        elif len(row) != width:
+            return (f'Row {row_num} has {len(row)} entries but row 1 has {width}. '
+                    'Every row of a matrix needs the same number of entries.')
+        # a copy, so changing the result doesn't change what's in known
+        rows.append(list(row))
+    return rows
+
+def _read_number(cell):
+    # the same numbers get_frac_from_string reads ("a/b", an int, or a decimal)
+    # as a fraction object, or None if cell isn't one
+    num, slash, den = cell.partition('/')
+    try:
+        if slash:
+            den = int(den)
+            return Fraction(int(num), den) if den != 0 else None
+        if '.' in cell:
+            return Fraction.from_float(float(cell))
+        return Fraction._make(int(cell), 1)
+    except ValueError:
+        return None
+
+def _token_error(cell, row, col, one_line):
+    # the error message for a cell which isn't a number
+    where = f'entry {col}' if one_line else f'row {row}, column {col}'
+    token = cell.strip()
+    if not token:
+        return (f'Invalid input at {where}: there is no number there. '
+                'Make sure there are no extra commas at the end of a line.')
+    if token.replace(' ', '').endswith('/0'):
+        return f'Invalid input at {where}: "{token}" divides by 0.'
+    return f'Invalid input at {where}: "{token}" is not a number.'
+
+def parse_vector(text, known=None):
+    """
+    Finds out whether a string contains a vector, and if it does,
+    converts it to a list of fraction objects and returns it.
+    - text is a string (one line of comma separated numbers, any
+      lines after the first are ignored).
+    - known is passed on to tokenize.
+    - Returns error message if text doesn't contain a vector, otherwise returns the
+      vector which it contains as a ParsedVector (or 0 if text is empty).
+    """
+    if not text.strip(): return 0 # string is empty
+    rows = tokenize(text, True, known)
+    if isinstance(rows, str): return rows
+    return ParsedVector(rows[0])
+
+def parse_matrix(text, known=None):
+    """
+    Finds out whether a string contains a matrix, and if it does,
+    converts it to a list of lists of fraction objects and returns it.
+    - text is a string (a line of comma separated numbers for each row).
+    - known is passed on to tokenize.
+    - Returns error message if text doesn't contain a matrix, otherwise returns the
+      matrix which it contains as a ParsedMatrix (or 0 if text is empty).
+    """
+    if not text.strip(): return 0 # string is empty
+    rows = tokenize(text, known=known)
+    if isinstance(rows, str): return rows
+    return ParsedMatrix(rows)
+
 def return_vector(t):
     """
     Finds out whether the text in t contains a vector, and if it does,
@@ -26,14 +173,7 @@ def return_vector(t):
     - Returns error message if t doesn't contain a vector, otherwise returns the vector 
       which it contains.
     """
-    inp = get_input(t)
-    if inp == 0: return 0
-    inp = inp[0].split(',')
-    for i,n in enumerate(inp):
-        try: inp[i] = get_frac_from_string(n)
-        except ValueError: # if it didn't work, input wasn't exclusively numbers
-            return 'Invalid input. Make sure there are no extra commas at the end of a line.'
-    return inp
+    return parse_vector(get_text(t))
 
 def return_matrix(t):
     """
@@ -43,16 +183,7 @@ def return_matrix(t):
     - Returns error message if t doesn't contain a matrix, otherwise returns the
       matrix which it contains.
     """
-    inp = get_input(t)
-    if inp == 0: return 0
-    for i in range(len(inp)):
-        inp[i] = inp[i].split(',')
-    for i in range(len(inp)):
-        for j in range(len(inp[i])):
-            try: inp[i][j] = get_frac_from_string(inp[i][j])
-            except ValueError:
-                return 'Invalid input. Make sure there are no extra commas at the end of a line.'
-    return inp
+    return parse_matrix(get_text(t))
 
 def is_vector(v):
     """
@@ -61,6 +192,8 @@ def is_vector(v):
     - Returns False if v is not a list of fraction objects.
       Returns True if it is.
     """
+    if isinstance(v, ParsedVector): # parse_vector already checked it
+        return True
     vec = True
     if isinstance(v, (list, np.ndarray)):
         for n in v:
@@ -80,6 +213,8 @@ def is_matrix(m):
       objects or if all of the rows aren't the same length.
       Returns True otherwise.
     """
+    if isinstance(m, ParsedMatrix): # parse_matrix already checked it
+        return True
     mat = True
     if isinstance(m, (list, np.ndarray)) and isinstance(m[0], (list, np.ndarray)):
         l = len(m[0])
@@ -126,7 +261,7 @@ def valid_mats(m1, m2):
     else:
         return "At least one of the inputs is invalid."
 
-def matvec_valid(v, m, op):
+def matvec_valid(v, m, op, lu=None):
     """
     Finds out whether vector v and matrix m are valid for operating
     with each other, whether it be solving Ax=b or projecting v on
@@ -135,13 +270,15 @@ def matvec_valid(v, m, op):
     - m is a matrix (list of lists of fraction objects).
     - op is a string operation, either "Matrix-Vector Multiply",
      "Solve Ax = b", or "Project (vec on mat)".
+    - lu is an LUFactorization of m or None, if it's given it is used
+      to check whether m is invertible instead of finding det(m).
     - Returns either a string (error message) if something went wrong,
       or True.
     """
     if is_vector(v) and is_matrix(m):
         if len(v) == len(m[0]):
             if op == "Solve Ax = b":
-                if det(m) == 0:
+                if lu.is_singular() if lu is not None else det(m) == 0:
                     return "The provided matrix was not invertible."
                 return True
             if op == "Matrix-Vector Multiply":
@@ -153,22 +290,25 @@ def matvec_valid(v, m, op):
     else:
         return "At least one of the inputs is invalid."
         
-def mat_valid(m, op):
+def mat_valid(m, op, lu=None):
     """
     Finds out whether the matrix m is valid for the given operation op.
     - m is a matrix (list of lists of fraction objects).
-    - op is a string, any of "Determinant", "Determinant (slow),
-      "REF", "RREF", "Inverse", "M^T * M", "GS Algorithm",
+    - op is a string, any of "Determinant", "Determinant (slow)",
+      "Determinant (Laplace)", "REF", "RREF", "Inverse", "M^T * M", "GS Algorithm",
     "Normalize Matrix", or "Eigen Matrix".
+    - lu is an LUFactorization of m or None, if it's given it is used
+      to check whether m is invertible. Otherwise that is left to
+      result_valid, since inverse finds it out anyway.
     - Returns either a string (error message) if something went wrong,
       or True.
     """
     if is_matrix(m):
         if op == "Inverse":
-            if det(m) == 0:
+            if len(m) != len(m[0]) or (lu is not None and lu.is_singular()):
                 return "The provided matrix was not invertible."
             return True
-        elif op in ("Determinant", "Determinant (slow)", "Eigen Matrix"):
+        elif op in ("Determinant", "Determinant (slow)", "Determinant (Laplace)", "Eigen Matrix"):
             if len(m) != len(m[0]):
                 return "The provided matrix was not square, so that operation will not work."
             return True
@@ -176,3 +316,18 @@ def mat_valid(m, op):
             return True
     else:
         return "The input (m1) is not a matrix."
+
+def result_valid(result, op):
+    """
+    Finds out whether the result of an operation is an actual answer.
+    Inverse finds out whether the matrix is invertible while it is
+    inverting it (and returns 0 if it isn't), so that gets checked
+    here instead of before doing the operation.
+    - result is whatever the operation returned.
+    - op is a string operation.
+    - Returns either a string (error message) if there was no answer,
+      or True.
+    """
+    if op == "Inverse" and isinstance(result, int) and result == 0:
+        return "The provided matrix was not invertible."
+    return True
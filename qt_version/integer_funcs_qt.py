@@ -0,0 +1,261 @@
+# integer kernel used by the fraction objects and the exact
+# (fraction-free) matrix algorithms.
+# gcd goes through a swappable backend: math.gcd by default, gmpy2
+# if it's installed, or one of the pure python versions in here.
+
+import math
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+# numbers smaller than this just use the plain euclidean algorithm in lehmer_gcd
+LEHMER_CUTOFF_BITS = 64
+# how many of the leading bits lehmer_gcd works with at a time
+LEHMER_DIGIT_BITS = 62
+
+
+def euclid_gcd(a, b):
+    """
+    Finds the greatest common divisor of a and b with the
+    (iterative) euclidean algorithm.
+    - a and b are integers.
+    - Returns a nonnegative integer.
+    """
+    a = abs(a)
+    b = abs(b)
+    while b:
+        a, b = b, a % b
+    return a
+
+def binary_gcd(a, b):
+    """
+    Finds the greatest common divisor of a and b with the binary (Stein's)
+    algorithm, which only uses shifts and subtraction.
+    - a and b are integers.
+    - Returns a nonnegative integer.
+    """
+    a = abs(a)
+    b = abs(b)
+    if a == 0: return b
+    if b == 0: return a
+    # the common power of 2 is the lowest set bit of a | b
+    shift = ((a | b) & -(a | b)).bit_length() - 1
+    a >>= (a & -a).bit_length() - 1
+    while b:
+        b >>= (b & -b).bit_length() - 1
+        # both odd now, so their difference is even
+        if a > b:
+            a, b = b, a
+        b -= a
+    return a << shift
+
+def lehmer_gcd(a, b):
+    """
+    Finds the greatest common divisor of a and b with Lehmer's algorithm.
+    It runs the euclidean algorithm on just the leading bits of a and b
+    (which are small enough to be cheap) for as long as the quotients are
+    guaranteed to be the same as for the full numbers, then applies all of
+    those steps to a and b at once. This saves a lot of big number divisions
+    when a and b have hundreds of digits.
+    - a and b are integers.
+    - Returns a nonnegative integer.
+    """
+    a = abs(a)
+    b = abs(b)
+    if a < b:
+        a, b = b, a
+    while b.bit_length() > LEHMER_CUTOFF_BITS:
+        shift = a.bit_length() - LEHMER_DIGIT_BITS
+        x = a >> shift
+        y = b >> shift
+        # [A B; C D] keeps track of the steps done on x and y
+        A, B, C, D = 1, 0, 0, 1
+        while y + C != 0 and y + D != 0:
+            q = (x + A) // (y + C)
+            if q != (x + B) // (y + D):
+                break
+            A, B, x, C, D, y = C, D, y, A - q * C, B - q * D, x - q * y
+        if B == 0:
+            # couldn't do any steps on the leading bits, so do one full step
+            a, b = b, a % b
+        else:
+            a, b = A * a + B * b, C * a + D * b
+    return euclid_gcd(a, b)
+
+def _gmpy2_gcd(a, b):
+    return int(gmpy2.gcd(a, b))
+
+GCD_BACKENDS = {
+    'math': math.gcd,
+    'euclid': euclid_gcd,
+    'binary': binary_gcd,
+    'lehmer': lehmer_gcd,
+}
+if gmpy2 is not None:
+    GCD_BACKENDS['gmpy2'] = _gmpy2_gcd
+
+_gcd = GCD_BACKENDS['gmpy2'] if gmpy2 is not None else math.gcd
+
+def set_gcd_backend(backend):
+    """
+    Changes the function used by gcd and gcd_many.
+    - backend is either the name of one of the functions in GCD_BACKENDS
+      ('math', 'euclid', 'binary', 'lehmer', or 'gmpy2' if it's installed),
+      or any function which takes two integers and returns their
+      (nonnegative) greatest common divisor.
+    - Returns nothing.
+    """
+    global _gcd
+    if isinstance(backend, str):
+        if backend not in GCD_BACKENDS:
+            raise ValueError(f'unknown gcd backend {backend!r}, choose from {", ".join(GCD_BACKENDS)}')
+        backend = GCD_BACKENDS[backend]
+    _gcd = backend
+
+def gcd(a, b):
+    """
+    Returns the greatest common divisor of a and b.
+    - a and b are integers.
+    - Returns a nonnegative integer.
+    """
+    return _gcd(a, b)
+
+def gcd_many(nums):
+    """
+    Finds the greatest common divisor of a whole list of integers
+    (for example a row of a matrix) at once. Stops early once the
+    answer is known to be 1.
+    - nums is a list of integers.
+    - Returns a nonnegative integer (0 if nums is empty or all zeros).
+    """
+    if _gcd is math.gcd:
+        return math.gcd(*nums)
+    result = 0
+    for n in nums:
+        if n:
+            result = _gcd(result, n)
+            if result == 1:
+                return 1
+    return result
+
+def lcm(a, b):
+    """
+    Returns the least common multiple of a and b.
+    - a and b are integers.
+    - Returns a nonnegative integer.
+    """
+    if a == 0 or b == 0:
+        return 0
+    return abs(a // _gcd(a, b) * b)
+
+def lcm_many(nums):
+    """
+    Finds the least common multiple of a list of integers
+    (for example all of the denominators in a row).
+    - nums is a list of nonzero integers.
+    - Returns a positive integer (1 if nums is empty).
+    """
+    result = 1
+    for n in nums:
+        if n != 1 and result % n:
+            result = lcm(result, n)
+    return result
+
+
+### MODULAR ARITHMETIC ###
+def is_prime(n):
+    """
+    Determines whether n is prime with the Miller-Rabin test. The bases used
+    make it exact for every n below 3.3 * 10^24.
+    - n is an integer.
+    - Returns a bool.
+    """
+    if n < 2:
+        return False
+    small = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for p in small:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in small:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def primes_below(n):
+    """
+    Generates primes in decreasing order, starting with the largest prime below n.
+    - n is an integer.
+    - Yields integers.
+    """
+    # only check odd numbers
+    odd = n - 1 if n % 2 == 0 else n - 2
+    while odd >= 3:
+        if is_prime(odd):
+            yield odd
+        odd -= 2
+    if n > 2:
+        yield 2
+
+def crt(r1, m1, r2, m2):
+    """
+    Combines x = r1 (mod m1) and x = r2 (mod m2) with the chinese
+    remainder theorem.
+    - r1, m1, r2, m2 are integers, m1 and m2 are coprime.
+    - Returns (r, m) where x = r (mod m), m = m1 * m2 and 0 <= r < m.
+    """
+    step = (r2 - r1) * pow(m1, -1, m2) % m2
+    return r1 + m1 * step, m1 * m2
+
+def symmetric_mod(r, m):
+    """
+    Returns the representative of r (mod m) which is closest
+    to 0 (between -m/2 and m/2).
+    - r and m are integers.
+    - Returns an integer.
+    """
+    r %= m
+    if r > m // 2:
+        r -= m
+    return r
+
+def rational_reconstruction(u, m, num_bound=None, den_bound=None):
+    """
+    Finds the fraction n/d with |n| <= num_bound and 0 < d <= den_bound
+    which is congruent to u (mod m), using the extended euclidean algorithm.
+    It is unique as long as 2 * num_bound * den_bound < m.
+    - u and m are integers.
+    - num_bound and den_bound are integers, both default to sqrt(m / 2).
+    - Returns (n, d) as integers, or None if there is no such fraction.
+    """
+    if num_bound is None:
+        num_bound = math.isqrt(m // 2)
+    if den_bound is None:
+        den_bound = math.isqrt(m // 2)
+    # keep r0 = t0 * u (mod m) and r1 = t1 * u (mod m) going down
+    r0, t0 = m, 0
+    r1, t1 = u % m, 1
+    while r1 > num_bound:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        t0, t1 = t1, t0 - q * t1
+    if t1 == 0 or abs(t1) > den_bound:
+        return None
+    if t1 < 0:
+        r1, t1 = -r1, -t1
+    if gcd(r1, t1) != 1:
+        return None
+    return r1, t1
@@ -0,0 +1,141 @@
+# the leibniz formula for the determinant (a sum over all n! permutations),
+# which det_slow uses as a cross-check on det. the permutations are never
+# all kept around: the first rows go through the partial permutations one
+# at a time, and for each of those the last TAIL_ROWS rows are done all at
+# once with numpy, using a table of the permutations of TAIL_ROWS things.
+# the partial permutations are independent, so they can be split between
+# worker processes.
+
+import functools
+import itertools
+import math
+
+import numpy as np
+
+from progress_qt import check_cancelled
+import parallel_qt
+
+# how many of the last rows are done at once with numpy (a table of 8! permutations)
+TAIL_ROWS = 8
+# matrices at least this big have their permutations split between worker processes
+PARALLEL_MIN_SIZE = 10
+# the permutations are split into at least this many blocks for each worker
+BLOCKS_PER_WORKER = 8
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def permute(n):
+    """
+    Goes through all of the permutations of [0, 1, .. , n - 1] with Heap's
+    algorithm, where each permutation is one swap away from the one before
+    it, so its sign is just the opposite of the last one. The same list is
+    changed in place and yielded every time (copy it to keep it), so only
+    O(n) space is used however many permutations there are.
+    - n is a non-negative integer.
+    - Yields (permutation, sign) where sign is 1 or -1.
+    """
+    a = list(range(n))
+    counters = [0 for _ in range(n)]
+    sign = 1
+    yield a, sign
+    i = 1
+    while i < n:
+        if counters[i] < i:
+            j = counters[i] if i % 2 else 0
+            a[j], a[i] = a[i], a[j]
+            sign = -sign
+            yield a, sign
+            counters[i] += 1
+            i = 1
+        else:
+            counters[i] = 0
+            i += 1
+
+def permutation_sign(p):
+    """
+    Finds the sign of a permutation by counting its inversions.
+    - p is a list of distinct integers.
+    - Returns 1 or -1.
+    """
+    inversions = 0
+    for i in range(len(p)):
+        for j in range(i + 1, len(p)):
+            if p[i] > p[j]:
+                inversions += 1
+    return -1 if inversions % 2 else 1
+
+@functools.lru_cache(maxsize=None)
+def _tail_table(k):
+    # every permutation of k things (one per row) and their signs
+    perms = np.empty((math.factorial(k), k), dtype=np.intp)
+    signs = np.empty(math.factorial(k), dtype=np.int64)
+    for i, (p, sign) in enumerate(permute(k)):
+        perms[i] = p
+        signs[i] = sign
+    return perms, signs
+
+
+def leibniz_block(args):
+    """
+    Adds up the terms of the leibniz formula for the permutations which
+    start with the given columns.
+    - args is (a, start) where a is a square numpy array (int64, object
+      for python ints, or float) and start is a tuple of the columns the
+      first few rows use (at most n - k of them, where k = min(n, TAIL_ROWS)).
+    - Returns a python int or float.
+    """
+    a, start = args
+    n = len(a)
+    k = min(n, TAIL_ROWS)
+    perms, signs = _tail_table(k)
+    rows = np.arange(k)
+    exact = a.dtype != float
+    left = [j for j in range(n) if j not in start]
+    count = math.perm(len(left), n - k - len(start))
+    total = 0
+    # the partial permutations are made one at a time, not all at once
+    for done, rest_of_prefix in enumerate(itertools.permutations(left, n - k - len(start))):
+        if done % 64 == 0:
+            check_cancelled(done, count)
+        prefix = start + rest_of_prefix
+        lead = 1
+        for i, j in enumerate(prefix):
+            lead *= int(a[i, j]) if exact else float(a[i, j])
+        if lead == 0:
+            continue
+        rest = sorted(set(left) - set(rest_of_prefix))
+        tail = a[n - k:][:, rest]
+        # terms[p] is the product down the last k rows for permutation p of the columns that are left
+        terms = tail[rows, perms].prod(axis=1)
+        tail_sum = int((terms * signs).sum()) if exact else float(terms @ signs)
+        total += permutation_sign(list(prefix) + rest) * lead * tail_sum
+    return total
+
+def leibniz_det(a, workers=None):
+    """
+    Finds the determinant of a square matrix with the leibniz formula,
+    in worker processes if it's big enough.
+    - a is a square matrix of python ints, or a square numpy float array.
+    - workers is how many processes to use, or None for parallel_qt.worker_count().
+    - Returns a python int (or a float if a was a float array).
+    """
+    n = len(a)
+    if n == 0:
+        return 1
+    k = min(n, TAIL_ROWS)
+    if isinstance(a, np.ndarray):
+        a = a.astype(float)
+    else:
+        biggest = max(abs(x) for row in a for x in row)
+        # the sum for each partial permutation has k! terms of k entries each
+        fits = biggest ** k * math.factorial(k) <= INT64_MAX
+        a = np.array(a, dtype=np.int64 if fits else object)
+    workers = workers or parallel_qt.worker_count()
+    if workers == 1 or n < PARALLEL_MIN_SIZE:
+        return leibniz_block((a, ()))
+    # split on the columns the first few rows use, until there are enough blocks to go around
+    depth = 0
+    while depth < n - k and math.perm(n, depth) < workers * BLOCKS_PER_WORKER:
+        depth += 1
+    blocks = [(a, start) for start in itertools.permutations(range(n), depth)]
+    return sum(parallel_qt.map_blocks(leibniz_block, blocks, workers))
@@ -1,4 +1,5 @@
 from fraction_qt import Fraction
+from rational_matrix_qt import RationalMatrix
 import numpy as np
 # assumes vector/matrix inputs are made of fraction objects
 ## WARNING
@@ -10,9 +11,13 @@ def format_answer(n):
     Decides whether n is a scalar, vector, or matrix,
     and formats it into a nice looking multi-line string.
     - n can be a scalar (int/float), vector (list), or 
-      matrix (list of lists).
+      matrix (list of lists), or a RationalMatrix.
     - Returns a string (or False if n is invalid).
     """
+    if isinstance(n, RationalMatrix):
+        if n.ndim == 2:
+            return format_matrix(n)
+        return format_vector(n)
     if isinstance(n, (list, np.ndarray)):
         if isinstance(n[0], (list, np.ndarray)):
             # n is a matrix
@@ -24,6 +29,20 @@ def format_answer(n):
         return format_fraction(n)
     return False
 
+def count_entries(n):
+    """
+    Counts how many numbers there are in n.
+    - n can be a scalar, vector, matrix, or a RationalMatrix.
+    - Returns an int (1 for a scalar).
+    """
+    if isinstance(n, RationalMatrix):
+        return int(np.prod(n.shape))
+    if isinstance(n, (list, np.ndarray)):
+        if len(n) and isinstance(n[0], (list, np.ndarray)):
+            return len(n) * len(n[0])
+        return len(n)
+    return 1
+
 def format_fraction(f):
     """
     Formats a fraction object into a nice looking multi-line string.
@@ -34,41 +53,45 @@ def format_fraction(f):
     - f is a fraction object.
     - Returns a string.
     """
-    if isinstance(f, Fraction) and not f.flt and f.denominator != 1:
-        num = str(f.numerator)
-        den = str(f.denominator)
-        num_len = len(num)
-        den_len = len(den)
-        max_len = max(num_len, den_len)
-        min_len = min(num_len, den_len)
-        diff = max_len - min_len
-
-        len_of_line = max_len + 2
-        line = "―" * len_of_line
-        space = " " * (diff // 2)
-        afterspace = " " * (diff - (diff // 2))
-        if max_len == num_len:
-            n = f" {num} "
-            d = f" {space}{den}{afterspace} "
-        else:
-            n = f" {space}{num}{afterspace} "
-            d = f" {den} "
-
-        result = f"{n}\n{line}\n{d}"
-        return result
+    top, middle, bottom, _ = cell_layout(f)
+    if top is None:
+        return middle
+    return f"{top}\n{middle}\n{bottom}"
 
+def cell_layout(f):
+    """
+    Lays out one entry of a vector or matrix the way format_fraction shows it,
+    but keeps its lines apart so they don't have to be split up again.
+    - f is a fraction object.
+    - Returns (top, middle, bottom, width) where middle is the line with the
+      number (or the fraction bar), top and bottom are the numerator and
+      denominator lines (None if f isn't shown as a fraction), and width is
+      how many characters wide every line is.
+    """
+    if isinstance(f, Fraction) and not f.flt:
+        den = f.denominator
+        if den != 1:
+            num = str(f.numerator)
+            den = str(den)
+            max_len = max(len(num), len(den))
+            if max_len == len(num):
+                top = f" {num} "
+                bottom = f" {pad(den, len(den), max_len)} "
+            else:
+                top = f" {pad(num, len(num), max_len)} "
+                bottom = f" {den} "
+            return top, "―" * (max_len + 2), bottom, max_len + 2
     if f.flt:
-        return str(round(float(f), 3))
+        text = str(round(float(f), 3))
+        return None, text, None, len(text)
     if f.denominator == 1:
-        return str(f)
+        text = str(f)
+        return None, text, None, len(text)
     raise TypeError("format_fraction() only takes fraction objects as arguments")
 
-def is_frac_in_row(row):
-    frac_exists = False
-    for f in row:
-        if '\n' in f:
-            frac_exists = True
-    return frac_exists
+def pad(text, width, col_width):
+    # centers text (which is width characters) in col_width characters, the extra space goes after it
+    return text.rjust(width + (col_width - width) // 2).ljust(col_width)
 
 def get_lines(len_col, i, frac_exists):
     """
@@ -125,72 +148,69 @@ def get_lines(len_col, i, frac_exists):
             eol1 = ' ⏐'
     return line_1, line_2, line_3, eol1, eol2, eol3
 
+def layout_lines(rows, col_widths):
+    """
+    Puts the lines of a vector or matrix together, with the brackets
+    around it and a blank line between each row.
+    - rows is a list of rows, each a list of what cell_layout returned.
+    - col_widths is a list of the widest entry in each column.
+    - Yields strings (the lines, without newlines).
+    """
+    inner = sum(col_widths) + 3 * (len(col_widths) - 1)
+    blank = ' ⏐ ' + ' ' * inner + ' ⏐'
+    for i, row in enumerate(rows):
+        if i:
+            yield blank
+        frac_exists = any(cell[0] is not None for cell in row)
+        line_1, line_2, line_3, eol1, eol2, eol3 = get_lines(len(rows), i, frac_exists)
+        if not frac_exists:
+            yield line_1 + '   '.join(pad(middle, width, col_width)
+                                      for (_, middle, _, width), col_width in zip(row, col_widths)) + eol1
+            continue
+        # the numbers that aren't fractions go on the middle line, with spaces above and below them
+        tops = []
+        middles = []
+        bottoms = []
+        for (top, middle, bottom, width), col_width in zip(row, col_widths):
+            if top is None:
+                top = bottom = ' ' * width
+            tops.append(pad(top, width, col_width))
+            middles.append(pad(middle, width, col_width))
+            bottoms.append(pad(bottom, width, col_width))
+        yield line_1 + '   '.join(tops) + eol1
+        yield line_2 + '   '.join(middles) + eol2
+        yield line_3 + '   '.join(bottoms) + eol3
+
+def iter_format_vector(v):
+    """
+    Formats a vector a line at a time (see format_vector).
+    - v is a vector (list of fraction objects).
+    - Yields strings (the lines, without newlines).
+    """
+    rows = [[cell_layout(f)] for f in v]
+    width = max((row[0][3] for row in rows), default=0)
+    yield from layout_lines(rows, [width])
+
 def format_vector(v):
     """
     Formats a vector into a vertical string.
     - v is a vector (list of fraction objects).
     - Returns a string.
     """
-    new_v = [format_fraction(f) for f in v]
-    max_length = 0
-    final = ''
-    for i in range(len(new_v)):
-        if '\n' in new_v[i]:
-            if (x := (len(new_v[i].split('\n')[1]))) > max_length:
-                max_length = x
-        elif len(new_v[i]) > max_length:
-            max_length = len(new_v[i])
-    for i in range(len(new_v)):
-        diff = 0
-        frac_exists = '\n' in new_v[i]
-        line_1, line_2, line_3, eol1, eol2, eol3 = get_lines(len(new_v), i, frac_exists)
-        if '\n' in new_v[i]:
-            a = new_v[i].split('\n')
-            if len(a[1]) < max_length:
-                diff = max_length - len(a[1])
-                # i'm doing diff // 2 in an attempt to center the items in the vector
-                line_1 += ' ' * (diff // 2)
-                line_2 += ' ' * (diff // 2)
-                line_3 += ' ' * (diff // 2)
-            line_1 += a[0]
-            line_2 += a[1]
-            line_3 += a[2]
-        else:
-            if len(new_v[i]) < max_length:
-                diff = max_length - len(new_v[i])
-                line_1 += ' ' * (diff // 2)
-            line_1 += new_v[i]
-
-        line_1 += (' ' * (diff - (diff // 2))) + eol1
-        if frac_exists:
-            line_2 += (' ' * (diff - (diff // 2))) + eol2
-            line_3 += (' ' * (diff - (diff // 2))) + eol3
-            final += '\n'.join([line_1, line_2, line_3])
-        else:
-            final += line_1
-        final += '\n ⏐ ' + (' ' * max_length) + ' ⏐\n'
-    final = final[:-(max_length + 6)] # remove ^that extra line
-    return final
+    lines = list(iter_format_vector(v))
+    return '\n'.join(lines) + '\n' if lines else ''
 
-def find_longest_strs(m):
+def iter_format_matrix(m):
     """
-    Finds the longest strings in the columns of a matrix.
-    - m is a matrix (list of lists of fraction objects)
-    - Returns a list containing a number for each column in
-      m, where the numbers represent the longest string
-      in that column.
+    Formats a matrix a line at a time, so a big one can be written to a
+    file without making the whole string (see format_matrix). Every entry
+    is formatted once, before the first line comes out.
+    - m is a matrix (list of vectors).
+    - Yields strings (the lines, without newlines).
     """
-    max_lengths = [0 for _ in range(len(m[0]))]
-    # find longest string in each column
-    for row in range(len(m)):
-        for col in range(len(m[0])):
-            if '\n' not in m[row][col]:
-                max_lengths[col] = max(max_lengths[col], len(m[row][col]))
-            else:
-                dashes = m[row][col].split('\n')[1]
-                dash_len = len(dashes)
-                max_lengths[col] = max(max_lengths[col], dash_len)
-    return max_lengths
+    rows = [[cell_layout(f) for f in row] for row in m]
+    col_widths = [max(row[j][3] for row in rows) for j in range(len(rows[0]))] if rows else []
+    yield from layout_lines(rows, col_widths)
 
 def format_matrix(m):
     """
@@ -198,60 +218,8 @@ def format_matrix(m):
     - m is a matrix (list of vectors).
     - Returns a string.
     """
-    new_m = [[format_fraction(f) for f in m[i]] for i in range(len(m))]
-    max_lengths = find_longest_strs(new_m)
-    # format rows similar to vectors but with spaces between columns
-    # according to max_lengths
-    final = ''
-    for i,row in enumerate(new_m):
-        frac_exists = is_frac_in_row(row)
-        line_1, line_2, line_3, eol1, eol2, eol3 = get_lines(len(new_m), i, frac_exists)
-        for j,f in enumerate(row):
-            diff = max_lengths[j] - len(f)
-            if frac_exists:
-                if '\n' in f:
-                    a = f.split('\n')
-                    # add spaces if not longest item in col
-                    diff = max_lengths[j] - len(a[1])
-                    prespace = diff // 2
-                    postspace = diff - (diff // 2)
-                    line_1 += ' ' * prespace
-                    line_2 += ' ' * prespace
-                    line_3 += ' ' * prespace
-                    line_1 += a[0] + (' ' * postspace) + '   '
-                    line_2 += a[1] + (' ' * postspace) + '   '
-                    line_3 += a[2] + (' ' * postspace) + '   '  
-                else:
-                    length = len(f)
-                    prespace = diff // 2
-                    postspace = diff - (diff // 2)
-                    line_1 += ' ' * prespace
-                    line_2 += ' ' * prespace
-                    line_3 += ' ' * prespace
-                    line_1 += ' ' * length + (' ' * postspace) + '   '
-                    line_2 += f + (' ' * postspace) + '   '
-                    line_3 += ' ' * length + (' ' * postspace) + '   '
-            # no fractions in row (just use line 1)
-            else:
-                # add spaces if not longest item in col
-                prespace = diff // 2
-                postspace = diff - (diff // 2)
-                line_1 += ' ' * prespace
-                line_1 += f + (' ' * postspace) + '   '
-
-        line_1 = line_1[:-3]
-        line_1 += eol1
-        if frac_exists:
-            line_2 = line_2[:-3]
-            line_3 = line_3[:-3]
-            line_2 += eol2
-            line_3 += eol3
-            final += '\n'.join([line_1, line_2, line_3])
-        else:
-            final += line_1
-        final += '\n ⏐ ' + (' ' * (len(line_1) - 5)) + ' ⏐\n'
-    final = final[:-(len(line_1) + 1)]
-    return final
+    lines = list(iter_format_matrix(m))
+    return '\n'.join(lines) + '\n' if lines else ''
 
 def get_csv(m):
     """
@@ -261,6 +229,11 @@ def get_csv(m):
     - Returns a string (comma separated list of numbers)
     """
     final = ''
+    if isinstance(m, RationalMatrix):
+        # no decimals in a rational matrix
+        if m.ndim == 2:
+            return '\n'.join(', '.join(str(n) for n in row) for row in m)
+        return ', '.join(str(n) for n in m)
     if isinstance(m, list):
         if isinstance(m[0], list):
             # m is a matrix
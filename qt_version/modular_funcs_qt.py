@@ -0,0 +1,315 @@
+# exact linear algebra on integer matrices done modulo a bunch of word-sized
+# primes. each prime only needs small numbers (vectorized with numpy int64),
+# and the real answer is put back together with the chinese remainder theorem.
+
+import math
+import random
+
+import numpy as np
+
+from integer_funcs_qt import crt, primes_below, rational_reconstruction, symmetric_mod
+from progress_qt import check_cancelled
+
+# primes are below this so that the product of two residues fits in an int64
+PRIME_LIMIT = 2 ** 31
+# det_int stops early once the answer hasn't changed for this many primes in a row
+STABLE_PRIMES = 3
+# and then checks it mod this many random primes before returning it
+VERIFY_PRIMES = 2
+# solve_int gives up on finding a prime where the matrix is invertible after this many
+SINGULAR_PRIMES = 3
+
+_primes = []
+_prime_gen = primes_below(PRIME_LIMIT)
+# its own generator so that seeding the random module can't make the checks predictable
+_random = random.Random()
+
+def modular_primes():
+    """
+    Generates the primes used for modular arithmetic, largest first.
+    They are only found once and then remembered.
+    - Yields integers (primes below PRIME_LIMIT).
+    """
+    i = 0
+    while True:
+        if i == len(_primes):
+            _primes.append(next(_prime_gen))
+        yield _primes[i]
+        i += 1
+
+def random_prime(below):
+    """
+    Picks a random prime between below / 2 and below.
+    - below is an integer (at least 8).
+    - Returns an integer.
+    """
+    return next(primes_below(_random.randrange(below // 2, below)))
+
+def to_int_array(rows):
+    """
+    Puts an integer matrix into an int64 numpy array if all of its entries
+    fit, or into an object array of python ints otherwise.
+    - rows is a list of lists of ints.
+    - Returns a 2-d numpy array.
+    """
+    a = np.array(rows, dtype=object)
+    biggest = max((abs(n) for row in rows for n in row), default=0)
+    if biggest < 2 ** 63:
+        return a.astype(np.int64)
+    return a
+
+def reduce_mod(a, p):
+    """
+    Reduces every entry of an integer array mod p.
+    - a is a numpy array of ints (int64 or object).
+    - p is a prime below PRIME_LIMIT.
+    - Returns an int64 numpy array with entries from 0 to p - 1.
+    """
+    if a.dtype == np.int64:
+        return a % p
+    return (a % p).astype(np.int64)
+
+def det_mod_p(a, p):
+    """
+    Finds the determinant of a square matrix mod p with Gaussian
+    Elimination, working on whole rows at once.
+    - a is a square int64 numpy array with entries from 0 to p - 1
+      (it is not modified).
+    - p is a prime below PRIME_LIMIT.
+    - Returns an integer (det(a) mod p).
+    """
+    a = a.copy()
+    n = len(a)
+    det = 1
+    for k in range(n):
+        nonzero = np.flatnonzero(a[k:, k])
+        if len(nonzero) == 0:
+            return 0
+        i = k + int(nonzero[0])
+        if i != k:
+            a[[k, i]] = a[[i, k]]
+            det = -det
+        pivot = int(a[k, k])
+        det = det * pivot % p
+        if k + 1 < n:
+            factors = a[k + 1:, k] * pow(pivot, -1, p) % p
+            a[k + 1:, k:] = (a[k + 1:, k:] - np.outer(factors, a[k, k:]) % p) % p
+    return det % p
+
+def hadamard_bound(rows):
+    """
+    Finds Hadamard's bound on the determinant of an integer matrix,
+    |det| <= product of the lengths of the rows.
+    - rows is a square list of lists of ints.
+    - Returns an integer at least as big as |det(rows)|.
+    """
+    bound = 1
+    for row in rows:
+        length_sq = sum(n * n for n in row)
+        if length_sq == 0:
+            return 0
+        root = math.isqrt(length_sq)
+        bound *= root if root * root == length_sq else root + 1
+    return bound
+
+def det_int(rows, early_stop=True):
+    """
+    Finds the determinant of a square integer matrix exactly by finding it
+    mod enough primes that their product is more than twice Hadamard's
+    bound, and combining the results with the chinese remainder theorem.
+    - rows is a square list of lists of ints.
+    - early_stop is a bool for whether to stop before the bound is reached,
+      once the combined answer stays the same for STABLE_PRIMES primes in a
+      row and it is also right mod VERIFY_PRIMES random primes. This is
+      usually long before the bound (for example when the determinant is 0
+      or much smaller than the bound). The primes before that are always the
+      same, so a determinant that is a multiple of all of them would stop
+      there at 0 every time; the random primes are what catch that. A wrong
+      answer is off by a nonzero number below 2 * bound, which has fewer than
+      log2(2 * bound) / 30 prime factors out of the ~5e7 primes a random prime
+      is picked from, so each random prime misses it with a chance below
+      log2(bound) / 1.5e9 (under 1e-5 even for a 1000 x 1000 matrix of
+      10 digit numbers, and that squared for both of them).
+    - Returns an integer (det(rows)).
+    """
+    bound = hadamard_bound(rows)
+    if bound == 0:
+        return 0
+    a = to_int_array(rows)
+    residue = 0
+    modulus = 1
+    previous = None
+    stable = 0
+    for p in modular_primes():
+        check_cancelled()
+        residue, modulus = crt(residue, modulus, det_mod_p(reduce_mod(a, p), p), p)
+        value = symmetric_mod(residue, modulus)
+        if modulus > 2 * bound:
+            return value
+        if early_stop:
+            stable = stable + 1 if value == previous else 0
+            previous = value
+            if stable >= STABLE_PRIMES:
+                # the random primes are below p, so they aren't any of the ones used already
+                if all(det_mod_p(reduce_mod(a, q), q) == value % q
+                       for q in (random_prime(p) for _ in range(VERIFY_PRIMES))):
+                    return value
+                stable = 0
+
+def inverse_mod_p(a, p):
+    """
+    Finds the inverse of a square matrix mod p with Gauss-Jordan
+    Elimination, working on whole rows at once.
+    - a is a square int64 numpy array with entries from 0 to p - 1.
+    - p is a prime below PRIME_LIMIT.
+    - Returns an int64 numpy array (a^-1 mod p), or None if a is
+      not invertible mod p.
+    """
+    n = len(a)
+    aug = np.concatenate((a, np.eye(n, dtype=np.int64)), axis=1)
+    for k in range(n):
+        check_cancelled()
+        nonzero = np.flatnonzero(aug[k:, k])
+        if len(nonzero) == 0:
+            return None
+        i = k + int(nonzero[0])
+        if i != k:
+            aug[[k, i]] = aug[[i, k]]
+        aug[k] = aug[k] * pow(int(aug[k, k]), -1, p) % p
+        factors = aug[:, k].copy()
+        factors[k] = 0
+        aug = (aug - np.outer(factors, aug[k]) % p) % p
+    return aug[:, n:]
+
+def matvec_mod_p(a, v, p):
+    """
+    Multiplies a matrix by a vector mod p without overflowing int64, by
+    splitting v into its top and bottom 16 bits.
+    - a is an int64 numpy array with entries from 0 to p - 1
+      (and fewer than 2^16 columns).
+    - v is an int64 numpy array with entries from 0 to p - 1.
+    - p is a prime below PRIME_LIMIT.
+    - Returns an int64 numpy array (a * v mod p).
+    """
+    high = (a @ (v >> 16)) % p
+    low = (a @ (v & 0xFFFF)) % p
+    return (high * 65536 + low) % p
+
+def solve_bounds(rows, b):
+    """
+    Finds bounds on the numerators and denominator of the solution to
+    Ax = b (from Hadamard's bound and Cramer's rule).
+    - rows is a square list of lists of ints (A).
+    - b is a list of ints.
+    - Returns (num_bound, den_bound) as integers.
+    """
+    col_lengths = []
+    for j in range(len(rows)):
+        length_sq = sum(row[j] * row[j] for row in rows)
+        col_lengths.append(math.isqrt(length_sq) + 1)
+    b_length = math.isqrt(sum(n * n for n in b)) + 1
+    den_bound = 1
+    for length in col_lengths:
+        den_bound *= length
+    # replacing the shortest column by b gives the biggest numerator
+    num_bound = den_bound // min(col_lengths) * b_length
+    return num_bound, den_bound
+
+def invert_mod_prime(rows):
+    """
+    Finds the inverse of a square integer matrix mod the first of the
+    modular primes where it is invertible.
+    - rows is a square list of lists of ints.
+    - Returns (p, inverse) where inverse is an int64 numpy array (rows^-1 mod p),
+      or None if rows isn't invertible.
+    """
+    a = to_int_array(rows)
+    primes = modular_primes()
+    for _ in range(SINGULAR_PRIMES):
+        p = next(primes)
+        inverse = inverse_mod_p(reduce_mod(a, p), p)
+        if inverse is not None:
+            return p, inverse
+    # rows is almost definitely singular, so make sure (det_int checks the
+    # answer with random primes, so this isn't fooled by a determinant that
+    # is a multiple of the first few primes)
+    if det_int(rows) == 0:
+        return None
+    while inverse is None:
+        p = next(primes)
+        inverse = inverse_mod_p(reduce_mod(a, p), p)
+    return p, inverse
+
+def solve_int(rows, b, mod_inverse=None):
+    """
+    Solves Ax = b exactly with Dixon's p-adic lifting. A is only inverted
+    once mod a prime p, then each step finds the next base p digit of the
+    solution from the current remainder and divides the remainder by p.
+    Once p^k is big enough, the fractions in the solution are found from
+    the p-adic ones with rational reconstruction.
+    - rows is a square list of lists of ints (A).
+    - b is a list of ints.
+    - mod_inverse is what invert_mod_prime(rows) returned, so that it can be
+      reused when solving with lots of b's, or None to find it here.
+    - Returns (nums, den) where the solution is x[i] = nums[i] / den, or None
+      if A isn't invertible.
+    """
+    n = len(rows)
+    a = to_int_array(rows)
+    if mod_inverse is None:
+        mod_inverse = invert_mod_prime(rows)
+        if mod_inverse is None:
+            return None
+    p, inverse = mod_inverse
+
+    num_bound, den_bound = solve_bounds(rows, b)
+    target = 2 * num_bound * den_bound
+    # A * (a digit vector) can be done in int64 if A's entries are small enough
+    if a.dtype == np.int64 and int(np.abs(a).max()) * p * n < 2 ** 63:
+        a_digits = a
+    else:
+        a_digits = a.astype(object)
+    remainder = np.array(b, dtype=object)
+    x = np.zeros(n, dtype=object)
+    power = 1
+    steps = 0
+    check_at = 4
+    while True:
+        check_cancelled()
+        digits = matvec_mod_p(inverse, reduce_mod(remainder, p), p)
+        x += digits.astype(object) * power
+        remainder = (remainder - a_digits @ digits) // p
+        power *= p
+        steps += 1
+        if power > target:
+            return _reconstruct(x, power, num_bound, den_bound)
+        if steps == check_at:
+            # the bounds are usually way bigger than the actual answer, so every
+            # so often try to reconstruct it early and check if it works
+            solution = _reconstruct(x, power)
+            if solution is not None and _check_solution(rows, b, *solution):
+                return solution
+            check_at *= 2
+
+def _reconstruct(x, modulus, num_bound=None, den_bound=None):
+    # finds the fractions that the p-adic solution x stands for, over a common denominator
+    den = 1
+    nums = []
+    for u in x:
+        u = int(u)
+        # the denominators found so far divide the common one, so take them out first
+        result = rational_reconstruction(u * den % modulus, modulus, num_bound, den_bound)
+        if result is None:
+            return None
+        n, d = result
+        if d != 1:
+            nums = [m * d for m in nums]
+            den *= d
+        nums.append(n)
+    return nums, den
+
+def _check_solution(rows, b, nums, den):
+    for row, rhs in zip(rows, b):
+        if sum(a * n for a, n in zip(row, nums)) != rhs * den:
+            return False
+    return True
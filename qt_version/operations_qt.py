@@ -0,0 +1,162 @@
+# the operations the calculator can do, and how to run one on its inputs.
+# nothing in here uses Qt, so the window (calc_qt) and the command line
+# version (cli_qt) both use it.
+
+from calc_funcs_qt import *
+from eigen_funcs_qt import format_eigenvalues
+from input_funcs_qt import *
+from matrix_format_qt import *
+
+
+class Func:
+    def __init__(self, func, active_boxes, text, info, lu_method=None):
+        self.func = func  # this is a function
+        self.active_boxes = active_boxes  # this is a list of 4 bools
+        self.text = text  # this is a string
+        self.info = info  # this is a string
+        # name of the LUFactorization method which can do the same thing as func
+        # from a factorization of M1, or None
+        self.lu_method = lu_method
+
+
+# the name of each operation (in the order they show up in the dropdown)
+FUNCS = {
+    'Add':                     Func(vec_add,        [1, 1, 0, 0],  'v1 + v2 =\n',                             'Adds v1 and v2 together.'),
+    'Subtract':                Func(vec_sub,        [1, 1, 0, 0],  'v1 - v2 =\n',                             'Subtracts v2 from v1.'),
+    'Matrix-Vector Multiply':  Func(vec_mat_mult,   [1, 0, 1, 0],  'M1 * v1 =\n',                             'Multiplies M1 by v1.'),
+    'Inner Product':           Func(inner_product,  [1, 1, 0, 0],  '<v1, v2> =\n',                            'Inner product (aka dot product) of v1 and v2 (multiplies components and adds them). For example, if v1 = [a, b] and v2 = [c, d] the inner product is ac + bd.'),
+    'Determinant':             Func(det,            [0, 0, 1, 0],  'Det(M1) =\n',                             'Takes the determinant of M1. Only works if M1 is square. Uses Gaussian Elimination, so it is pretty fast.', 'det'),
+    'Determinant (slow)':      Func(det_slow,       [0, 0, 1, 0],  'Det(M1) =\n',                             'Takes the determinant of M1. Only works if M1 is square. Uses the Leibniz formula, which works incredibly slow for large matrices (if a matrix is n x n, the computer must perform more than n factorial operations). The permutations are split between processes, so it can still do up to about 12 x 12.'),
+    'Determinant (Laplace)':   Func(det_laplace,    [0, 0, 1, 0],  'Det(M1) =\n',                             'Takes the determinant of M1. Only works if M1 is square. Uses Laplace (cofactor) expansion, remembering the determinant of each smaller piece of the matrix so it is only found once. That takes about 2^n * n operations for an n x n matrix, so it is much faster than the slow determinant (but still slow past about 20 x 20), and it never divides, so it is a good check on the other two.'),
+    'REF':                     Func(ref,            [0, 0, 1, 0],  'REF(M1) =\n',                             'Puts M1 into row echelon form (upper triangular). If there is a 0 on one of the diagonals, the matrix is not invertible.'),
+    'RREF':                    Func(rref,           [0, 0, 1, 0],  'RREF(M1) =\n',                            'Puts M1 into reduced row echelon form (1 on the diagonals where possible). If there is a 0 on one of the diagonals, the matrix is not invertible.'),
+    'Solve Ax = b':            Func(solve,          [1, 0, 1, 0],  'x = \n',                                  'Uses Gaussian Elimination (via row reduction) to solve Ax = b, where A is M1 and b is v1. Does not work if the matrix is not invertible. The LU-factorization of M1 is kept, so solving again with a different b is much faster.', 'solve'),
+    'Inverse':                 Func(inverse,        [0, 0, 1, 0],  'M1^(-1) =\n',                             'Finds the inverse of M1 using Gauss-Jordan Elimination (via row reduction). If det(M1) = 0, there is no inverse.', 'inverse'),
+    'Matrix Multiply':         Func(mat_mult,       [0, 0, 1, 1],  'M1 * M2 =\n',                             'Multiplies M1 by M2 (on the right).'),
+    'Project (vec on vec)':    Func(project,        [1, 1, 0, 0],  'Proj_{v2}(v1) =\n',                       'Projects v1 onto v2.'),
+    'Project (vec on mat)':    Func(project,        [1, 0, 1, 0],  'Proj_{M1}(v1) =\n',                       'Projects v1 onto the subspace spanned by the columns of M1.'),
+    'M^T * M':                 Func(aTa,            [0, 0, 1, 0],  'M^T * M =\n',                             'Multiplies the transpose of M1 by M1 (on the right). The resulting matrix is both square and symmetric.'),
+    'GS Algorithm':            Func(gs,             [0, 0, 1, 0],  'orthogonal matrix\n(spans col(M1))\n',    'The Gram Schmidt Algorithm is an algorithm which produces an orthogonal matrix which spans the same column space as the given matrix. It steals the first column of the original matrix, then uses a projection of the subsequent columns onto the current result to create orthogonal columns.'),
+    'QR-Factorization':        Func(qr,             [0, 0, 1, 0],  'Q,R =\n',                                 'Factorizes M1 into Q and R, where Q is orthogonal and R is upper-triangular.'),
+    'Normalize Vector':        Func(normalize_vec,  [1, 0, 0, 0],  'norm(v1) =\n',                            'Normalizes v1.'),
+    'Normalize Matrix':        Func(normalize_mat,  [0, 0, 1, 0],  'norm(M1) =\n',                            'Normalizes the columns of M1.'),
+    'Eigen Matrix':            Func(eigen_matrix,   [0, 0, 1, 0],  'eigenvalues on diagonal:\n',              'Reduces M1 to Hessenberg form and uses the shifted QR-algorithm to create an upper-triangular matrix with the eigenvalues of M1 on the diagonal. Complex eigenvalues show up as 2x2 blocks on the diagonal, and all of the eigenvalues (complex or not) are listed under the matrix. If M1 is symmetric (like the result of M^T * M), it is reduced to tridiagonal form and the QL-algorithm is used instead, which is faster, and the eigenvectors are listed too.')
+}
+
+
+def shows_as_table(op, result, table_min_entries=None):
+    """
+    Decides whether a result is too big to format as text, so it should
+    be shown in a table instead.
+    - op is the name of the operation.
+    - result is what the operation returned.
+    - table_min_entries is how many entries a result needs to be shown
+      in a table, or None to always format it.
+    - Returns a bool.
+    """
+    # qr and eigen_matrix show more than one thing, so they're always text
+    return (table_min_entries is not None and FUNCS[op].func not in (qr, eigen_matrix)
+            and count_entries(result) >= table_min_entries)
+
+def format_result(op, result, table_min_entries=None):
+    """
+    - op is the name of the operation, result is what it returned.
+    - table_min_entries is passed on to shows_as_table.
+    - Returns the text to show for the result (just the part before
+      the result if it's going to be shown in a table).
+    """
+    if shows_as_table(op, result, table_min_entries):
+        return FUNCS[op].text
+    return FUNCS[op].text + format_answer(result)
+
+def compute(current_op, v1, v2, m1, m2, m1_key=None, lu=None, ref_d=None, table_min_entries=None):
+    """
+    Does the calculation for an operation. This doesn't touch any widgets
+    or caches, so the window can run it in a worker thread and cli_qt
+    can run it in a worker process.
+    - current_op is the name of the operation.
+    - v1, v2, m1 and m2 are the inputs (or 0 for the ones that aren't used).
+    - m1_key is the fingerprint of the text in M1 (what the artifacts
+      are kept under), or None.
+    - lu is a cached LUFactorization of m1 or None.
+    - ref_d is a cached (REF(m1), d) or None.
+    - table_min_entries is passed on to shows_as_table, results that
+      will be shown in a table aren't formatted.
+    - Returns (msg, result, artifacts) where artifacts is a list of
+      (key, value) to put in the cache, or raises ValueError with a
+      message to show if the input isn't right.
+    """
+    current_func = FUNCS[current_op]
+    f = current_func.func
+    active_items = current_func.active_boxes
+    lu_method = current_func.lu_method
+    artifacts = []
+
+    if lu_method is not None and ref_d is None:
+        # the factorization is kept, so solve, inverse and determinant on the
+        # same M1 after this don't have to do any elimination
+        if lu is None and is_matrix(m1) and len(m1) == len(m1[0]):
+            lu = factorize(m1)
+            artifacts.append((('artifact', 'LU', m1_key), lu))
+        if lu is not None:
+            f = getattr(lu, lu_method)
+
+    if active_items == [1, 1, 0, 0]:
+        if isinstance((a := valid_vecs(v1, v2)), str):
+            raise ValueError(a)
+        result = f(v1, v2)
+
+    elif active_items == [1, 0, 1, 0]:
+        if isinstance((a := matvec_valid(v1, m1, current_op, lu)), str):
+            raise ValueError(a)
+        result = f(v1) if lu is not None else f(v1, m1)
+
+    elif active_items == [1, 0, 0, 0]:
+        if not is_vector(v1):
+            raise ValueError("The input (v1) is not a vector.")
+        result = f(v1)
+
+    elif active_items == [0, 0, 1, 0]:
+        if isinstance((a := mat_valid(m1, current_op, lu)), str):
+            raise ValueError(a)
+        if f == qr:
+            result_1, result_2 = f(m1)
+            msg = current_func.text
+            msg += format_answer(result_1) + '\n'
+            msg += format_answer(result_2)
+            return msg, (result_1, result_2), artifacts
+        if f == eigen_matrix:
+            result, values, iterations, converged, vectors = f(m1, return_info=True)
+            msg = current_func.text
+            msg += format_answer(result) + '\n'
+            msg += 'eigenvalues:\n' + format_eigenvalues(values) + '\n'
+            if vectors is not None:
+                # m1 was symmetric
+                msg += 'eigenvectors (columns, in the same order):\n' + format_answer(vectors) + '\n'
+            steps = 'QR' if vectors is None else 'QL'
+            if converged:
+                msg += f'(found in {iterations} {steps} iterations)'
+            else:
+                msg += f'(did not converge after {iterations} {steps} iterations, so these are rough)'
+            return msg, result, artifacts
+        if f == ref:
+            reduced, d = f(m1, True)
+            artifacts.append((('artifact', 'REF', m1_key), (reduced, d)))
+            result = reduced
+        elif ref_d is not None:
+            reduced, d = ref_d
+            result = diagonal_product(reduced) * d
+        else:
+            result = f() if lu is not None else f(m1)
+        if isinstance((a := result_valid(result, current_op)), str):
+            raise ValueError(a)
+
+    elif active_items == [0, 0, 1, 1]:
+        if isinstance((a := valid_mats(m1, m2)), str):
+            raise ValueError(a)
+        result = f(m1, m2)
+
+    else:
+        raise ValueError('something went wrong.')
+
+    return format_result(current_op, result, table_min_entries), result, artifacts
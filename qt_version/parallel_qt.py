@@ -0,0 +1,180 @@
+# exact matrix products split across processes. the rows of the result are
+# cut into blocks which are worked out in a ProcessPoolExecutor. fraction
+# objects are slow to pickle, so every matrix is sent as one buffer of integer
+# numerators plus a scale for each row (the left matrix is scaled by rows,
+# the right matrix by columns), and the right matrix is only sent once to
+# each worker process, when it starts.
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+import operator
+import os
+
+import numpy as np
+
+from fraction_qt import Fraction
+from integer_funcs_qt import lcm_many
+from progress_qt import check_cancelled
+
+# how many processes to use, None means one for each core
+WORKERS = None
+# products with fewer multiplications than this are done in this process,
+# since starting the worker processes takes longer than the product would
+PARALLEL_MIN_WORK = 16_000_000
+# each worker gets about this many blocks of rows, so they all finish at about the same time
+BLOCKS_PER_WORKER = 4
+# worker processes are started fresh instead of forked, since forking a
+# process which has other threads running (like the window) isn't safe
+START_METHOD = 'spawn'
+
+
+def set_workers(n):
+    """
+    Sets how many processes the products are split across.
+    - n is a positive integer, or None for one for each core.
+    """
+    global WORKERS
+    if n is not None and n < 1:
+        raise ValueError('There has to be at least one worker.')
+    WORKERS = n
+
+def worker_count():
+    """
+    - Returns how many processes the products are split across.
+    """
+    return WORKERS or os.cpu_count() or 1
+
+
+def pack_ints(ints):
+    """
+    Packs a list of ints (of any size) into one buffer.
+    - ints is a list of python ints.
+    - Returns (width, buffer) where every int takes up width bytes of buffer.
+    """
+    width = max((n.bit_length() for n in ints), default=0) // 8 + 1
+    if width <= 8:
+        return 8, np.array(ints, dtype=np.int64).tobytes()
+    return width, b''.join(n.to_bytes(width, 'little', signed=True) for n in ints)
+
+def unpack_ints(width, buffer):
+    """
+    Undoes pack_ints.
+    - width and buffer are what pack_ints returned.
+    - Returns a list of python ints.
+    """
+    if width == 8:
+        return np.frombuffer(buffer, dtype=np.int64).tolist()
+    return [int.from_bytes(buffer[i:i + width], 'little', signed=True)
+            for i in range(0, len(buffer), width)]
+
+def scale_rows(m):
+    """
+    Multiplies each row of a matrix by the lcm of its denominators.
+    - m is a matrix with no decimals in it (fraction objects or ints).
+    - Returns (rows, scales) where rows is a list of lists of ints and
+      scales[i] is what row i was multiplied by.
+    """
+    rows = []
+    scales = []
+    for row in m:
+        scale = lcm_many([n.denominator for n in row if isinstance(n, Fraction)])
+        rows.append([n.numerator * (scale // n.denominator) if isinstance(n, Fraction) else int(n) * scale
+                     for n in row])
+        scales.append(scale)
+    return rows, scales
+
+def encode(rows, scales):
+    # everything in (rows, scales) as two buffers
+    cols = len(rows[0]) if rows else 0
+    return cols, pack_ints(scales), pack_ints([n for row in rows for n in row])
+
+def decode(encoded):
+    # undoes encode
+    cols, scales, nums = encoded
+    nums = unpack_ints(*nums)
+    return [nums[i:i + cols] for i in range(0, len(nums), cols)], unpack_ints(*scales)
+
+
+def _multiply_rows(rows, columns):
+    # the numerators of rows * columns^T in row-major order (only ints, so this is fast)
+    return [sum(map(operator.mul, row, col)) for row in rows for col in columns]
+
+# the scaled columns of the right matrix, in a worker process
+_columns = None
+
+def _init_worker(encoded):
+    global _columns
+    _columns, _ = decode(encoded)
+
+def _multiply_block(encoded):
+    rows, _ = decode(encoded)
+    return pack_ints(_multiply_rows(rows, _columns))
+
+
+def mat_mult(m1, m2, workers=None):
+    """
+    Multiplies two exact matrices. The entries are scaled to ints first so the
+    inner products don't make any fraction objects, and big products are split
+    into blocks of rows which are done in worker processes.
+    - m1 is a matrix (on the left), m2 is a matrix (on the right), neither
+      with decimals in them.
+    - workers is how many processes to use, or None for worker_count().
+    - Returns a matrix (m1 * m2, in that order).
+    """
+    workers = workers or worker_count()
+    rows, row_scales = scale_rows(m1)
+    columns, col_scales = scale_rows([[row[j] for row in m2] for j in range(len(m2[0]))])
+    work = len(rows) * len(columns) * len(m2)
+    if workers > 1 and len(rows) > 1 and work >= PARALLEL_MIN_WORK:
+        nums = _multiply_parallel(rows, row_scales, columns, col_scales, workers)
+    else:
+        nums = []
+        block = max(1, len(rows) // 100)
+        for start in range(0, len(rows), block):
+            check_cancelled(start, len(rows))
+            nums += _multiply_rows(rows[start:start + block], columns)
+    n = len(columns)
+    return [[Fraction._make(nums[i * n + j], row_scales[i] * col_scales[j]) for j in range(n)]
+            for i in range(len(rows))]
+
+def _multiply_parallel(rows, row_scales, columns, col_scales, workers):
+    # the numerators of the product, worked out a block of rows at a time by worker processes
+    block = -(-len(rows) // (workers * BLOCKS_PER_WORKER))
+    blocks = [encode(rows[i:i + block], row_scales[i:i + block]) for i in range(0, len(rows), block)]
+    results = map_blocks(_multiply_block, blocks, workers, _init_worker, (encode(columns, col_scales),))
+    return [n for packed in results for n in unpack_ints(*packed)]
+
+def map_blocks(func, blocks, workers=None, initializer=None, initargs=()):
+    """
+    Calls func on each block in a pool of worker processes, checking
+    for cancellation (and reporting progress) while it waits.
+    - func is a function at the top of a module (so the workers can import it).
+    - blocks is a list of arguments for func (each is pickled once).
+    - workers is how many processes to use, or None for worker_count().
+    - initializer and initargs are run once in each worker when it starts.
+    - Returns a list of what func returned for each block, in the same order.
+    """
+    workers = workers or worker_count()
+    context = multiprocessing.get_context(START_METHOD)
+    pool = ProcessPoolExecutor(workers, mp_context=context, initializer=initializer, initargs=initargs)
+    try:
+        futures = [pool.submit(func, block) for block in blocks]
+        pending = set(futures)
+        while pending:
+            check_cancelled(len(futures) - len(pending), len(futures))
+            _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+    except BaseException:
+        # cancelled (or something went wrong), so don't wait for the rest of the blocks
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return [f.result() for f in futures]
+
+def vec_mat_mult(v, m, workers=None):
+    """
+    Multiplies an exact matrix by an exact vector (on the right), the same way as mat_mult.
+    - v is a vector, m is a matrix, neither with decimals in them.
+    - workers is how many processes to use, or None for worker_count().
+    - Returns a vector (m * v).
+    """
+    return [row[0] for row in mat_mult(m, [[c] for c in v], workers)]
@@ -0,0 +1,66 @@
+# cooperative cancellation and progress reporting for long computations.
+# the window runs each computation in the background with a CancelToken,
+# and the long loops in calc_funcs_qt (and the modules it uses) call
+# check_cancelled every so often, which raises Cancelled once the token has
+# been cancelled from another thread. outside of cancellable (for example
+# when calc_funcs_qt is used on its own) check_cancelled does nothing.
+
+from contextlib import contextmanager
+import threading
+
+
+class Cancelled(Exception):
+    """
+    Raised inside a computation once its CancelToken has been cancelled.
+    """
+
+
+class CancelToken:
+    """
+    Lets one thread ask a computation running in another thread to stop.
+    on_progress is called with (done, total) whenever the computation
+    says how far along it is.
+    """
+    def __init__(self, on_progress=None):
+        # on_progress is a function taking two integers, or None
+        self.on_progress = on_progress
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+_local = threading.local()
+
+@contextmanager
+def cancellable(token):
+    """
+    Makes check_cancelled (in this thread) use token until the with block ends.
+    - token is a CancelToken.
+    """
+    previous = getattr(_local, 'token', None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+def check_cancelled(done=None, total=None):
+    """
+    Stops the computation if it has been cancelled, and otherwise
+    reports how far along it is.
+    - done and total are integers (how many steps out of how many are
+      finished), or None if the loop doesn't know.
+    - Returns nothing, or raises Cancelled.
+    """
+    token = getattr(_local, 'token', None)
+    if token is None:
+        return
+    if token.cancelled:
+        raise Cancelled()
+    if total and token.on_progress is not None:
+        token.on_progress(done, total)
@@ -45,17 +45,21 @@ class calcWindow(QtWidgets.QWidget):
         self.cb = QtWidgets.QComboBox()
         self.textFieldsBtn = QtWidgets.QPushButton("Clear Text Fields")
         self.calculateBtn = QtWidgets.QPushButton("Calculate")
+        self.cancelBtn = QtWidgets.QPushButton("Cancel")
+        self.cancelBtn.setEnabled(False)
 
         self.opText.setSizePolicy(self.maxPolicy)
 
         self.cb.currentIndexChanged.connect(self.dropdownEvent)
         self.textFieldsBtn.clicked.connect(self.clearText)
         self.calculateBtn.clicked.connect(self.calculate)
+        self.cancelBtn.clicked.connect(self.cancelCalculation)
 
         self.topHorzLayout.addWidget(self.opText)
         self.topHorzLayout.addWidget(self.cb)
         self.topHorzLayout.addWidget(self.textFieldsBtn)
         self.topHorzLayout.addWidget(self.calculateBtn)
+        self.topHorzLayout.addWidget(self.cancelBtn)
         return self.topHorzLayout
 
     def setInputSection(self):
@@ -175,8 +179,24 @@ class calcWindow(QtWidgets.QWidget):
         self.resultBox.setReadOnly(True)
         self.resultBox.setFont(self.smallfnt)
 
+        # big results go in a table instead of the text box
+        self.resultTablePage = QtWidgets.QWidget()
+        self.resultTableLayout = QtWidgets.QVBoxLayout(self.resultTablePage)
+        self.resultTableLayout.setContentsMargins(0, 0, 0, 0)
+        self.resultTableTitle = QtWidgets.QLabel()
+        self.resultTableTitle.setFont(self.smallfnt)
+        self.resultTable = QtWidgets.QTableView()
+        self.resultTable.setFont(self.smallfnt)
+        self.resultTable.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.resultTableLayout.addWidget(self.resultTableTitle)
+        self.resultTableLayout.addWidget(self.resultTable)
+
+        self.resultStack = QtWidgets.QStackedWidget()
+        self.resultStack.addWidget(self.resultBox)
+        self.resultStack.addWidget(self.resultTablePage)
+
         self.resultLayout.addWidget(self.resultLabel)
-        self.resultLayout.addWidget(self.resultBox)
+        self.resultLayout.addWidget(self.resultStack)
         return self.resultLayout
 
     def setBottomButtons(self):
@@ -184,6 +204,11 @@ class calcWindow(QtWidgets.QWidget):
         self.copyBtn = QtWidgets.QPushButton("Copy Result")
         self.toFractionBtn = QtWidgets.QPushButton("Convert to Fraction (approx)")
         self.toDecBtn = QtWidgets.QPushButton("Convert to Decimal")
+        self.cacheLabel = QtWidgets.QLabel("cache: 0 hits, 0 misses, 0.0 MB")
+        self.cacheLabel.setSizePolicy(self.maxPolicy)
+        self.progressBar = QtWidgets.QProgressBar()
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(0)
 
         self.copyBtn.clicked.connect(self.copyResult)
         self.toFractionBtn.clicked.connect(self.toFraction)
@@ -192,6 +217,8 @@ class calcWindow(QtWidgets.QWidget):
         self.lowerHorzLayout.addWidget(self.copyBtn)
         self.lowerHorzLayout.addWidget(self.toFractionBtn)
         self.lowerHorzLayout.addWidget(self.toDecBtn)
+        self.lowerHorzLayout.addWidget(self.progressBar)
+        self.lowerHorzLayout.addWidget(self.cacheLabel)
         return self.lowerHorzLayout
 
 
@@ -0,0 +1,279 @@
+import functools
+
+import numpy as np
+
+from fraction_qt import Fraction
+from integer_funcs_qt import gcd, gcd_many, lcm, lcm_many
+
+INT64_MAX = np.iinfo(np.int64).max
+
+
+class RationalMatrix:
+    """
+    A vector (1-d) or matrix (2-d) of rational numbers, stored as a numpy
+    array of integer numerators over one shared positive denominator.
+    The numerators are kept in an int64 array while everything fits, and
+    are promoted to an object array of python ints as soon as an operation
+    could overflow. The numerators and denominator are always kept in
+    lowest terms (their gcd is 1), so two equal matrices look the same.
+    """
+    __slots__ = ('num', 'den')
+
+    def __init__(self, num, den=1):
+        # num is a numpy array of ints (int64 or object), den is a positive int
+        if den <= 0:
+            raise ZeroDivisionError('A rational matrix needs a positive denominator.')
+        self.num = _shrink(num)
+        self.den = int(den)
+        self._normalize()
+
+    @classmethod
+    def from_rows(cls, m):
+        """
+        Creates a rational matrix out of a vector or matrix.
+        - m is a vector (list of fraction objects/ints) or a matrix
+          (list of lists of fraction objects/ints) with no decimals in it.
+        - Returns a RationalMatrix.
+        """
+        if isinstance(m, RationalMatrix):
+            return m
+        is_mat = isinstance(m[0], (list, np.ndarray))
+        rows = m if is_mat else [m]
+        for row in rows:
+            for n in row:
+                if isinstance(n, Fraction):
+                    if n.flt:
+                        raise TypeError('A rational matrix can only hold exact numbers, not decimals.')
+                elif not isinstance(n, (int, np.integer)):
+                    raise TypeError(f'A rational matrix can not hold {type(n).__name__} objects.')
+        den = lcm_many([n.denominator for row in rows for n in row if isinstance(n, Fraction)])
+        nums = [[n.numerator * (den // n.denominator) if isinstance(n, Fraction) else int(n) * den
+                 for n in row] for row in rows]
+        num = np.array(nums, dtype=object)
+        if not is_mat:
+            num = num[0]
+        return cls(num, den)
+
+    def _normalize(self):
+        if self.den == 1:
+            return
+        if self.num.dtype == np.int64:
+            common = gcd(int(np.gcd.reduce(self.num, axis=None)) if self.num.size else 0, self.den)
+        else:
+            common = gcd_many(list(self.num.ravel()) + [self.den])
+        if common > INT64_MAX:
+            # only 0 is a multiple of something that big, so the numerators are all 0
+            self.den = 1
+        elif common > 1:
+            self.num = self.num // common
+            self.den //= common
+
+    ### SHAPE / ACCESS ###
+    @property
+    def shape(self):
+        return self.num.shape
+
+    @property
+    def ndim(self):
+        return self.num.ndim
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def __len__(self):
+        return len(self.num)
+
+    def __getitem__(self, index):
+        # indexing a matrix with one number gives back a row (list of fractions),
+        # indexing a vector or indexing a matrix with (i, j) gives a fraction
+        item = self.num[index]
+        if isinstance(item, np.ndarray):
+            return [Fraction(int(n), self.den) for n in item]
+        return Fraction(int(item), self.den)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self):
+        """
+        Converts back to the usual list (of lists) of fraction objects.
+        - Returns a vector or matrix.
+        """
+        return [self[i] for i in range(len(self))]
+
+    def __repr__(self):
+        return f'RationalMatrix({self.num.tolist()!r}, {self.den})'
+
+    def __eq__(self, other):
+        if isinstance(other, RationalMatrix):
+            return (self.shape == other.shape and self.den == other.den
+                    and bool(np.all(self.num == other.num)))
+        if isinstance(other, list):
+            return self.tolist() == other
+        return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    ### ARITHMETIC ###
+    def transpose(self):
+        """
+        Returns the transpose of the matrix (a vector stays the same).
+        """
+        return RationalMatrix(self.num.T.copy(), self.den)
+
+    def __neg__(self):
+        return RationalMatrix(-self.num, self.den)
+
+    def __add__(self, other):
+        if not isinstance(other, RationalMatrix):
+            try:
+                other = RationalMatrix.from_rows(other)
+            except (TypeError, IndexError):
+                return NotImplemented
+        if self.shape != other.shape:
+            raise ValueError('Can only add rational matrices of the same shape.')
+        den = lcm(self.den, other.den)
+        a_scale = den // self.den
+        b_scale = den // other.den
+        # the scales are multiplied in even when the numerators are all 0, so they have to fit too
+        bound = max(_max_abs(self.num) * a_scale + _max_abs(other.num) * b_scale, a_scale, b_scale)
+        a, b = _promote(bound, self.num, other.num)
+        if a_scale != 1: a = a * a_scale
+        if b_scale != 1: b = b * b_scale
+        return RationalMatrix(a + b, den)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, RationalMatrix):
+            try:
+                other = RationalMatrix.from_rows(other)
+            except (TypeError, IndexError):
+                return NotImplemented
+        return self + -other
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        # scalar multiplication, or elementwise multiplication by another rational matrix
+        if isinstance(other, RationalMatrix):
+            if self.shape != other.shape:
+                raise ValueError('Can only multiply rational matrices of the same shape elementwise.')
+            bound = _max_abs(self.num) * _max_abs(other.num)
+            a, b = _promote(bound, self.num, other.num)
+            return RationalMatrix(a * b, self.den * other.den)
+        if isinstance(other, Fraction) and not other.flt:
+            p, q = other.numerator, other.denominator
+        elif isinstance(other, (int, np.integer)):
+            p, q = int(other), 1
+        else:
+            return NotImplemented
+        # p has to fit in int64 to multiply by it at all, even if the numerators are all 0
+        a, = _promote(max(_max_abs(self.num) * abs(p), abs(p)), self.num)
+        return RationalMatrix(a * p, self.den * q)
+
+    __rmul__ = __mul__
+
+    def __matmul__(self, other):
+        if not isinstance(other, RationalMatrix):
+            try:
+                other = RationalMatrix.from_rows(other)
+            except (TypeError, IndexError):
+                return NotImplemented
+        inner = self.shape[-1]
+        if inner != other.shape[0]:
+            raise ValueError('The inner dimensions of the rational matrices do not line up.')
+        # no partial sum can be bigger than this
+        bound = _max_abs(self.num) * _max_abs(other.num) * inner
+        a, b = _promote(bound, self.num, other.num)
+        result = a @ b
+        den = self.den * other.den
+        if self.ndim == 1 and other.ndim == 1:
+            return Fraction(int(result), den)
+        return RationalMatrix(result, den)
+
+    def __rmatmul__(self, other):
+        try:
+            other = RationalMatrix.from_rows(other)
+        except (TypeError, IndexError):
+            return NotImplemented
+        return other @ self
+
+
+def _max_abs(a):
+    # largest absolute value in the array as a python int
+    if a.size == 0:
+        return 0
+    if a.dtype == np.int64:
+        return int(np.abs(a).max())
+    return max(abs(int(n)) for n in a.flat)
+
+def _shrink(a):
+    # stores a as int64 if everything in it fits, otherwise as python ints
+    a = np.asarray(a)
+    if a.dtype == np.int64:
+        return a
+    if a.dtype != object:
+        return a.astype(np.int64)
+    if _max_abs(a) <= INT64_MAX:
+        return a.astype(np.int64)
+    return a
+
+def _promote(bound, *arrays):
+    # switches the arrays to python ints if bound (the biggest number an
+    # operation on them could produce) doesn't fit in int64
+    if bound <= INT64_MAX:
+        return arrays
+    return tuple(a.astype(object) for a in arrays)
+
+def as_rational(*args):
+    """
+    Tries to turn all of args into rational matrices.
+    - args are vectors, matrices or rational matrices.
+    - Returns a tuple of rational matrices, or None if one of args
+      has a decimal in it (so it can't be a rational matrix).
+    """
+    try:
+        return tuple(RationalMatrix.from_rows(a) for a in args)
+    except TypeError:
+        return None
+
+def as_lists(*args):
+    """
+    Turns any rational matrices in args back into lists.
+    - args are vectors, matrices or rational matrices.
+    - Returns a tuple of vectors/matrices (lists).
+    """
+    return tuple(a.tolist() if isinstance(a, RationalMatrix) else a for a in args)
+
+def accepts_rational_matrix(f):
+    """
+    Decorator for functions which work on lists of fraction objects so that
+    they also take rational matrices. Any RationalMatrix arguments are turned
+    into lists first, and if any were given, the vectors and matrices in the
+    result are turned back into rational matrices (when they have no decimals).
+    - f is a function.
+    - Returns a function.
+    """
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not any(isinstance(a, RationalMatrix) for a in args):
+            return f(*args, **kwargs)
+        return _to_rational(f(*as_lists(*args), **kwargs))
+    return wrapper
+
+def _to_rational(result):
+    if isinstance(result, tuple):
+        return tuple(_to_rational(r) for r in result)
+    if isinstance(result, list) and result:
+        try:
+            return RationalMatrix.from_rows(result)
+        except TypeError:
+            return result
+    return result
@@ -0,0 +1,69 @@
+# a table model for showing big results in a QTableView instead of as text.
+# the view only asks for the cells it's showing, so the cells are formatted
+# as they're scrolled to and a 300 x 300 result shows up as fast as a small one.
+
+from PySide6 import QtCore
+
+from fraction_qt import Fraction
+from rational_matrix_qt import RationalMatrix
+
+
+def format_cell(n):
+    """
+    Formats one entry of a result on one line.
+    - n is a fraction object (or a number).
+    - Returns a string ("a/b" for fractions, decimals rounded to 3 places
+      like format_fraction does).
+    """
+    if isinstance(n, Fraction) and not n.flt:
+        return str(n)
+    return str(round(float(n), 3))
+
+
+class ResultModel(QtCore.QAbstractTableModel):
+    """
+    A read-only table model of a vector or matrix. A vector is shown as
+    one column. The full decimal of each entry is its tooltip.
+    """
+    def __init__(self, result, parent=None):
+        # result is a vector or matrix (lists of fraction objects or a RationalMatrix)
+        super().__init__(parent)
+        self.result = result
+        if isinstance(result, RationalMatrix):
+            self.is_matrix = result.ndim == 2
+        else:
+            self.is_matrix = isinstance(result[0], list)
+        self.rows = len(result)
+        self.cols = len(result[0]) if self.is_matrix else 1
+
+    def entry(self, i, j):
+        # the entry in row i and column j
+        if not self.is_matrix:
+            return self.result[i]
+        if isinstance(self.result, RationalMatrix):
+            return self.result[i, j]
+        return self.result[i][j]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.cols
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return format_cell(self.entry(index.row(), index.column()))
+        if role == QtCore.Qt.ToolTipRole:
+            n = self.entry(index.row(), index.column())
+            return str(n) if isinstance(n, Fraction) and not n.flt else repr(float(n))
+        if role == QtCore.Qt.TextAlignmentRole:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        # rows and columns are numbered from 1, like in the error messages
+        if role == QtCore.Qt.DisplayRole:
+            return str(section + 1)
+        return None
@@ -0,0 +1,119 @@
+# symmetric matrices. aTa makes them (M^T * M is always symmetric), and only
+# half of the work is needed to make one or to factor one, since the entries
+# below the diagonal are the same as the ones above it.
+
+import operator
+
+from fraction_qt import Fraction
+from integer_funcs_qt import lcm_many
+from progress_qt import check_cancelled
+
+# gram_matrix goes through a tall matrix this many rows at a time, so the
+# columns scaled to ints are never all in memory at once
+GRAM_BLOCK_ROWS = 256
+
+
+class SymmetricMatrix(list):
+    """
+    A matrix (list of rows) which is known to be symmetric, so the
+    operations which have a faster way for symmetric matrices don't
+    have to check. It is still just a list of lists otherwise.
+    """
+
+
+def is_symmetric(m):
+    """
+    Determines whether a matrix is symmetric (equal to its transpose).
+    - m is a matrix.
+    - Returns a bool.
+    """
+    if isinstance(m, SymmetricMatrix):
+        return True
+    n = len(m)
+    if n != len(m[0]):
+        return False
+    for i in range(n):
+        for j in range(i + 1, n):
+            if m[i][j] != m[j][i]:
+                return False
+    return True
+
+def column_scales(m):
+    """
+    Finds the lcm of the denominators in each column of a matrix.
+    - m is a matrix with no decimals in it (fraction objects or ints).
+    - Returns a list of ints, one for each column.
+    """
+    return [lcm_many([row[j].denominator for row in m if isinstance(row[j], Fraction)])
+            for j in range(len(m[0]))]
+
+def gram_matrix(m, block_rows=GRAM_BLOCK_ROWS):
+    """
+    Multiplies an exact matrix by its transpose (on the left), only working out
+    the entries on and above the diagonal and copying them below it. Every
+    column is scaled to ints first so the inner products are all on ints, and
+    the rows are gone through block_rows at a time, adding up the inner products
+    of each block, so tall matrices are never copied all at once.
+    - m is a matrix with no decimals in it (fraction objects or ints).
+    - block_rows is a positive integer.
+    - Returns a SymmetricMatrix (m^T * m).
+    """
+    row_num = len(m)
+    n = len(m[0])
+    scales = column_scales(m)
+    # sums[i][j - i] is the scaled entry (i, j) for j >= i
+    sums = [[0 for _ in range(n - i)] for i in range(n)]
+    for start in range(0, row_num, block_rows):
+        check_cancelled(start, row_num)
+        block = m[start:start + block_rows]
+        cols = [[row[j].numerator * (scales[j] // row[j].denominator) if isinstance(row[j], Fraction)
+                 else int(row[j]) * scales[j] for row in block] for j in range(n)]
+        for i in range(n):
+            col = cols[i]
+            row_sums = sums[i]
+            for j in range(i, n):
+                row_sums[j - i] += sum(map(operator.mul, col, cols[j]))
+    result = [[None for _ in range(n)] for _ in range(n)]
+    for i in range(n):
+        for j in range(i, n):
+            result[i][j] = Fraction._make(sums[i][j - i], scales[i] * scales[j])
+            if j != i:
+                result[j][i] = Fraction._make(sums[i][j - i], scales[i] * scales[j])
+    return SymmetricMatrix(result)
+
+def symmetric_bareiss(rows):
+    """
+    Does fraction-free (Bareiss) Gaussian Elimination on a symmetric matrix
+    of ints without any row swaps. Every matrix along the way is still
+    symmetric, so only the entries on and above the diagonal are worked out
+    (about half the work of bareiss). This is the fraction-free version of
+    an LDL^T factorization.
+    - rows is a symmetric matrix of ints (a list of lists, it is not modified).
+    - Returns (result, divisors) like bareiss does, where result only has the
+      entries on and above the diagonal filled in (the rest are 0), or None if
+      a pivot is 0 (so a row swap would be needed and bareiss has to be used).
+    """
+    n = len(rows)
+    result = [[rows[i][j] if j >= i else 0 for j in range(n)] for i in range(n)]
+    divisors = [1 for _ in range(n)]
+    prev = 1 # previous pivot
+    for k in range(n):
+        check_cancelled(k, n)
+        pivot_row = result[k]
+        pivot = pivot_row[k]
+        if pivot == 0:
+            return None
+        divisors[k] = prev
+        for i in range(k + 1, n):
+            row = result[i]
+            # entry (i, k) is the same as entry (k, i)
+            mult = pivot_row[i]
+            if mult == 0:
+                if prev != pivot:
+                    for j in range(i, n):
+                        row[j] = row[j] * pivot // prev
+                continue
+            for j in range(i, n):
+                row[j] = (row[j] * pivot - pivot_row[j] * mult) // prev
+        prev = pivot
+    return result, divisors